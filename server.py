@@ -1,20 +1,34 @@
 """PanWatch 统一服务入口 - Web 后台 + Agent 调度"""
+import asyncio
 import logging
 import os
+import queue
+import shutil
+import sys
+import threading
 import time
+from collections import defaultdict
 from contextlib import asynccontextmanager
+from dataclasses import replace
+from logging.handlers import QueueHandler, QueueListener
 
 import uvicorn
+from anyio import to_thread as anyio_to_thread
+from sqlalchemy import String, case, func, or_, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
 
-from src.web.database import init_db, SessionLocal
+from src.web.database import init_db, SessionLocal, session_scope, MAX_DB_CONNECTIONS
 from src.web.models import AgentConfig, Stock, StockAgent, AIService, AIModel, NotifyChannel, AppSettings, DataSource
 from src.web.log_handler import DBLogHandler
-from src.config import Settings, AppConfig, StockConfig
+from src.config import get_settings, AppConfig, StockConfig
 from src.models.market import MarketCode
 from src.core.ai_client import AIClient
 from src.core.notifier import NotifierManager
 from src.core.scheduler import AgentScheduler
 from src.core.agent_runs import record_agent_run
+from src.core.config_cache import config_cached
+from src.core.agent_meta import get_agent_meta, reload_agent_meta, split_agent_config
 from src.agents.base import AgentContext, PortfolioInfo, AccountInfo, PositionInfo
 from src.agents.daily_report import DailyReportAgent
 from src.agents.news_digest import NewsDigestAgent
@@ -27,12 +41,19 @@ logger = logging.getLogger(__name__)
 # 全局 scheduler 实例，供 agents API 调用
 scheduler: AgentScheduler | None = None
 
+# 关闭服务时等待后台初始化线程退出的最长时间（秒）
+BACKGROUND_STOP_TIMEOUT = 10
+
 
 def setup_ssl():
     """设置 SSL 证书环境（企业代理环境）"""
-    settings = Settings()
+    settings = get_settings()
     ca_cert = settings.ca_cert_file
-    if not ca_cert or not os.path.exists(ca_cert):
+    if not ca_cert:
+        return
+    try:
+        ca_mtime = os.stat(ca_cert).st_mtime
+    except FileNotFoundError:
         return
 
     import certifi
@@ -40,26 +61,33 @@ def setup_ssl():
     bundle_path = os.path.join(os.path.dirname(__file__), "data", "ca-bundle.pem")
     os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
 
-    need_rebuild = (
-        not os.path.exists(bundle_path)
-        or os.path.getmtime(ca_cert) > os.path.getmtime(bundle_path)
-    )
+    # 每个文件只 stat 一次，bundle 不存在时按 mtime=0 处理
+    try:
+        bundle_mtime = os.stat(bundle_path).st_mtime
+    except FileNotFoundError:
+        bundle_mtime = 0
+    need_rebuild = ca_mtime > bundle_mtime
 
     if need_rebuild:
-        with open(bundle_path, "w") as out:
-            with open(certifi.where(), "r") as f:
-                out.write(f.read())
-            out.write("\n")
-            with open(ca_cert, "r") as f:
-                out.write(f.read())
+        # 二进制分块拷贝，内存占用恒定
+        with open(bundle_path, "wb") as out:
+            with open(certifi.where(), "rb") as f:
+                shutil.copyfileobj(f, out, 64 * 1024)
+            out.write(b"\n")
+            with open(ca_cert, "rb") as f:
+                shutil.copyfileobj(f, out, 64 * 1024)
 
     os.environ["SSL_CERT_FILE"] = bundle_path
     os.environ["REQUESTS_CA_BUNDLE"] = bundle_path
     logger.info(f"SSL 证书已加载: {bundle_path}")
 
 
-def setup_logging():
-    """配置日志: 控制台 + 数据库"""
+def setup_logging() -> QueueListener:
+    """配置日志: 控制台 + 数据库
+
+    数据库写入经 QueueHandler 转交给 QueueListener 的独立线程，
+    事件循环中的日志调用只做一次入队，不再同步写库。返回 listener，退出时需 stop()。
+    """
     root = logging.getLogger()
     root.setLevel(logging.INFO)
 
@@ -71,14 +99,40 @@ def setup_logging():
     # 数据库持久化
     db_handler = DBLogHandler(level=logging.DEBUG)
     db_handler.setFormatter(logging.Formatter("%(message)s"))
-    root.addHandler(db_handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, db_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def _write_ready_marker(path: str):
+    """写入 Playwright 就绪标记，失败不影响启动"""
+    try:
+        open(path, "w").close()
+    except OSError as e:
+        logger.warning(f"写入 Playwright 就绪标记失败: {e}")
+
+
+def _kill_process_tree(proc):
+    """终止子进程及其进程组（POSIX），并回收进程"""
+    if sys.platform != "win32":
+        import signal
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.kill()
+    proc.wait()
 
 
-def setup_playwright():
+def setup_playwright(stop: threading.Event | None = None):
     """检查并安装 Playwright 浏览器
 
     本地开发时使用系统安装的 Playwright，Docker 环境下安装到 data 目录。
     通过 DOCKER 环境变量或显式设置的 PLAYWRIGHT_BROWSERS_PATH 来判断。
+    stop 被设置时（服务关闭）终止安装进程并返回。
     """
     import subprocess
 
@@ -97,13 +151,20 @@ def setup_playwright():
         logger.info("本地开发环境，使用系统 Playwright")
         return
 
-    # 检查是否已安装
+    # 安装成功后写入标记文件，重启时只需一次 stat 即可跳过目录扫描
+    ready_marker = os.path.join(browser_dir, ".ready")
+    if os.path.exists(ready_marker):
+        logger.info(f"Playwright 浏览器已就绪: {browser_dir}")
+        return
+
+    # 检查是否已安装（兼容标记文件出现之前的安装）
     if os.path.exists(browser_dir):
         try:
-            dirs = os.listdir(browser_dir)
-            if any(d.startswith("chromium") for d in dirs if os.path.isdir(os.path.join(browser_dir, d))):
-                logger.info(f"Playwright 浏览器已就绪: {browser_dir}")
-                return
+            with os.scandir(browser_dir) as it:
+                if any(e.name.startswith("chromium") and e.is_dir() for e in it):
+                    _write_ready_marker(ready_marker)
+                    logger.info(f"Playwright 浏览器已就绪: {browser_dir}")
+                    return
         except Exception:
             pass
 
@@ -112,19 +173,35 @@ def setup_playwright():
     os.makedirs(browser_dir, exist_ok=True)
 
     try:
-        result = subprocess.run(
+        proc = subprocess.Popen(
             ["playwright", "install", "chromium"],
             env={**os.environ, "PLAYWRIGHT_BROWSERS_PATH": browser_dir},
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=600,  # 10 分钟超时
+            # 独立进程组，终止时连同其启动的子进程（浏览器下载）一起结束
+            start_new_session=sys.platform != "win32",
         )
-        if result.returncode == 0:
+        deadline = time.monotonic() + 600  # 10 分钟超时
+        # 每秒检查一次是否需要停止，服务关闭时不必等待安装完成
+        while True:
+            try:
+                _, stderr = proc.communicate(timeout=1)
+                break
+            except subprocess.TimeoutExpired:
+                if stop is not None and stop.is_set():
+                    _kill_process_tree(proc)
+                    logger.info("服务关闭，已终止 Playwright 安装")
+                    return
+                if time.monotonic() > deadline:
+                    _kill_process_tree(proc)
+                    logger.error("Playwright 安装超时（网络问题？）")
+                    return
+        if proc.returncode == 0:
+            _write_ready_marker(ready_marker)
             logger.info("Playwright 浏览器安装完成")
         else:
-            logger.error(f"Playwright 安装失败: {result.stderr}")
-    except subprocess.TimeoutExpired:
-        logger.error("Playwright 安装超时（网络问题？）")
+            logger.error(f"Playwright 安装失败: {stderr}")
     except FileNotFoundError:
         logger.warning("Playwright 命令不可用，K线截图功能不可用")
     except Exception as e:
@@ -146,8 +223,7 @@ def seed_sample_stocks():
             {"symbol": "00700", "name": "腾讯控股", "market": "HK"},
             {"symbol": "AAPL", "name": "苹果", "market": "US"},
         ]
-        for s in samples:
-            db.add(Stock(**s, enabled=True))
+        db.bulk_insert_mappings(Stock, [{**s, "enabled": True} for s in samples])
         db.commit()
         logger.info("已添加 5 只示例股票（首次启动）")
     finally:
@@ -211,21 +287,29 @@ def seed_agents():
         },
     ]
 
-    for agent_data in agents:
-        existing = db.query(AgentConfig).filter(AgentConfig.name == agent_data["name"]).first()
-        if not existing:
-            db.add(AgentConfig(**agent_data))
-        else:
-            # 始终同步 execution_mode（确保代码中的定义生效）
-            existing.execution_mode = agent_data.get("execution_mode", "batch")
-            # 同步 display_name 和 description
-            existing.display_name = agent_data.get("display_name", existing.display_name)
-            existing.description = agent_data.get("description", existing.description)
-            # 仅在用户未配置时补齐默认 config
-            if agent_data.get("config") and (not existing.config):
-                existing.config = agent_data.get("config")
-
+    # 一条 INSERT ... ON CONFLICT 完成插入/同步：
+    # 始终同步 execution_mode、display_name、description；仅在用户未配置时补齐默认 config
+    rows = [{"config": {}, **agent_data} for agent_data in agents]
+    stmt = sqlite_insert(AgentConfig).values(rows)
+    existing_config = type_coerce(AgentConfig.config, String)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            "execution_mode": stmt.excluded.execution_mode,
+            "display_name": stmt.excluded.display_name,
+            "description": stmt.excluded.description,
+            "config": case(
+                (
+                    or_(existing_config.is_(None), existing_config.in_(["{}", "null", ""])),
+                    stmt.excluded.config,
+                ),
+                else_=AgentConfig.config,
+            ),
+        },
+    )
+    db.execute(stmt)
     db.commit()
+    reload_agent_meta(db=db)
     db.close()
 
 
@@ -329,11 +413,16 @@ def seed_data_sources():
         },
     ]
 
+    # data_sources 表没有 (name, provider) 唯一约束，无法 ON CONFLICT，改为一次查出已有记录再比对
+    existing_map = {
+        (ds.name, ds.provider): ds
+        for ds in db.query(DataSource).filter(
+            DataSource.name.in_([source["name"] for source in sources])
+        ).all()
+    }
+    new_sources = []
     for source_data in sources:
-        existing = db.query(DataSource).filter(
-            DataSource.name == source_data["name"],
-            DataSource.provider == source_data["provider"],
-        ).first()
+        existing = existing_map.get((source_data["name"], source_data["provider"]))
         if existing:
             # 更新已存在记录的新字段（保留用户可能修改的配置）
             if existing.supports_batch != source_data.get("supports_batch", False):
@@ -341,17 +430,17 @@ def seed_data_sources():
             if not existing.test_symbols:  # 只在空时更新
                 existing.test_symbols = source_data.get("test_symbols", [])
         else:
-            db.add(DataSource(**source_data))
+            new_sources.append(DataSource(**source_data))
+    db.add_all(new_sources)
 
     db.commit()
     db.close()
     logger.info("预置数据源初始化完成")
 
 
-def load_watchlist_for_agent(agent_name: str) -> list[StockConfig]:
+def load_watchlist_for_agent(agent_name: str, db: Session | None = None) -> list[StockConfig]:
     """从数据库加载某个 Agent 关联的自选股"""
-    db = SessionLocal()
-    try:
+    with session_scope(db) as db:
         stock_agents = db.query(StockAgent).filter(StockAgent.agent_name == agent_name).all()
         stock_ids = [sa.stock_id for sa in stock_agents]
         if not stock_ids:
@@ -370,16 +459,13 @@ def load_watchlist_for_agent(agent_name: str) -> list[StockConfig]:
                 market=market,
             ))
         return result
-    finally:
-        db.close()
 
 
-def load_portfolio_for_agent(agent_name: str) -> PortfolioInfo:
+def load_portfolio_for_agent(agent_name: str, db: Session | None = None) -> PortfolioInfo:
     """从数据库加载某个 Agent 关联股票的持仓信息（包括多账户）"""
     from src.web.models import Account, Position
 
-    db = SessionLocal()
-    try:
+    with session_scope(db) as db:
         # 获取 Agent 关联的股票 ID
         stock_agents = db.query(StockAgent).filter(StockAgent.agent_name == agent_name).all()
         stock_ids = set(sa.stock_id for sa in stock_agents)
@@ -389,16 +475,24 @@ def load_portfolio_for_agent(agent_name: str) -> PortfolioInfo:
         # 获取所有启用的账户
         accounts = db.query(Account).filter(Account.enabled == True).all()
 
-        account_infos = []
-        for acc in accounts:
-            # 获取该账户中属于关联股票的持仓
-            positions = db.query(Position).filter(
-                Position.account_id == acc.id,
+        # 一次查出所有账户中属于关联股票的持仓（连同股票信息），按账户分组
+        positions = (
+            db.query(Position)
+            .options(selectinload(Position.stock))
+            .filter(
+                Position.account_id.in_([acc.id for acc in accounts]),
                 Position.stock_id.in_(stock_ids),
-            ).all()
+            )
+            .all()
+        )
+        positions_by_account: dict[int, list] = defaultdict(list)
+        for pos in positions:
+            positions_by_account[pos.account_id].append(pos)
 
+        account_infos = []
+        for acc in accounts:
             position_infos = []
-            for pos in positions:
+            for pos in positions_by_account[acc.id]:
                 stock = pos.stock
                 if not stock or not stock.enabled:
                     continue
@@ -428,16 +522,13 @@ def load_portfolio_for_agent(agent_name: str) -> PortfolioInfo:
             ))
 
         return PortfolioInfo(accounts=account_infos)
-    finally:
-        db.close()
 
 
-def load_portfolio_for_stock(stock_id: int) -> PortfolioInfo:
+def load_portfolio_for_stock(stock_id: int, db: Session | None = None) -> PortfolioInfo:
     """从数据库加载单只股票的持仓信息"""
     from src.web.models import Account, Position
 
-    db = SessionLocal()
-    try:
+    with session_scope(db) as db:
         stock = db.query(Stock).filter(Stock.id == stock_id).first()
         if not stock:
             return PortfolioInfo()
@@ -449,12 +540,16 @@ def load_portfolio_for_stock(stock_id: int) -> PortfolioInfo:
 
         accounts = db.query(Account).filter(Account.enabled == True).all()
 
+        # 一次查出该股票在各账户的持仓（每个账户至多一条）
+        positions = db.query(Position).filter(
+            Position.account_id.in_([acc.id for acc in accounts]),
+            Position.stock_id == stock_id,
+        ).all()
+        position_by_account = {pos.account_id: pos for pos in positions}
+
         account_infos = []
         for acc in accounts:
-            pos = db.query(Position).filter(
-                Position.account_id == acc.id,
-                Position.stock_id == stock_id,
-            ).first()
+            pos = position_by_account.get(acc.id)
 
             position_infos = []
             if pos:
@@ -479,85 +574,63 @@ def load_portfolio_for_stock(stock_id: int) -> PortfolioInfo:
             ))
 
         return PortfolioInfo(accounts=account_infos)
-    finally:
-        db.close()
 
 
-def _get_proxy() -> str:
+@config_cached
+def _get_proxy(db: Session | None = None) -> str:
     """从 app_settings 获取 http_proxy"""
-    db = SessionLocal()
-    try:
+    with session_scope(db) as db:
         setting = db.query(AppSettings).filter(AppSettings.key == "http_proxy").first()
         return setting.value if setting and setting.value else ""
-    finally:
-        db.close()
 
 
-def resolve_ai_model(agent_name: str, stock_agent_id: int | None = None) -> tuple[AIModel | None, AIService | None]:
+@config_cached
+def resolve_ai_model(agent_name: str, stock_agent_id: int | None = None, db: Session | None = None) -> tuple[AIModel | None, AIService | None]:
     """解析 AI 模型: stock_agent 覆盖 → agent 默认 → 系统默认(is_default=True)
     返回 (model, service) 元组"""
-    db = SessionLocal()
-    try:
-        model_id = None
-
-        # 1. stock_agent 级别覆盖
+    with session_scope(db) as db:
+        # 按优先级依次取第一个非空 model_id，合并为一次查询：
+        # stock_agent 覆盖 → agent 默认 → 系统默认 → 回退取第一个
+        candidates = []
         if stock_agent_id:
-            sa = db.query(StockAgent).filter(StockAgent.id == stock_agent_id).first()
-            if sa and sa.ai_model_id:
-                model_id = sa.ai_model_id
-
-        # 2. agent 级别默认
-        if not model_id:
-            agent = db.query(AgentConfig).filter(AgentConfig.name == agent_name).first()
-            if agent and agent.ai_model_id:
-                model_id = agent.ai_model_id
-
-        # 3. 系统默认
-        if not model_id:
-            default_model = db.query(AIModel).filter(AIModel.is_default == True).first()
-            if default_model:
-                model_id = default_model.id
-
-        # 4. 回退：取第一个
-        if not model_id:
-            first_model = db.query(AIModel).first()
-            if first_model:
-                model_id = first_model.id
-
-        if not model_id:
-            return None, None
+            candidates.append(
+                select(StockAgent.ai_model_id).where(StockAgent.id == stock_agent_id).scalar_subquery()
+            )
+        candidates += [
+            select(AgentConfig.ai_model_id).where(AgentConfig.name == agent_name).scalar_subquery(),
+            select(AIModel.id).where(AIModel.is_default == True).limit(1).scalar_subquery(),
+            select(AIModel.id).limit(1).scalar_subquery(),
+        ]
 
-        model = db.query(AIModel).filter(AIModel.id == model_id).first()
-        if not model:
+        row = db.query(AIModel, AIService).outerjoin(
+            AIService, AIService.id == AIModel.service_id
+        ).filter(AIModel.id == func.coalesce(*candidates)).first()
+        if not row:
             return None, None
 
-        service = db.query(AIService).filter(AIService.id == model.service_id).first()
-        if model:
-            db.expunge(model)
+        model, service = row
+        db.expunge(model)
         if service:
             db.expunge(service)
         return model, service
-    finally:
-        db.close()
 
 
-def resolve_notify_channels(agent_name: str, stock_agent_id: int | None = None) -> list[NotifyChannel]:
+@config_cached
+def resolve_notify_channels(agent_name: str, stock_agent_id: int | None = None, db: Session | None = None) -> list[NotifyChannel]:
     """解析通知渠道: stock_agent 覆盖 → agent 默认 → 系统默认(is_default=True)"""
-    db = SessionLocal()
-    try:
-        channel_ids = None
-
-        # 1. stock_agent 级别覆盖
+    with session_scope(db) as db:
+        # 1/2. 一次查询同时取出 stock_agent 覆盖和 agent 默认的渠道列表
+        agent_ids_subq = select(AgentConfig.notify_channel_ids).where(
+            AgentConfig.name == agent_name
+        ).scalar_subquery()
         if stock_agent_id:
-            sa = db.query(StockAgent).filter(StockAgent.id == stock_agent_id).first()
-            if sa and sa.notify_channel_ids:
-                channel_ids = sa.notify_channel_ids
-
-        # 2. agent 级别默认
-        if channel_ids is None:
-            agent = db.query(AgentConfig).filter(AgentConfig.name == agent_name).first()
-            if agent and agent.notify_channel_ids:
-                channel_ids = agent.notify_channel_ids
+            sa_ids_subq = select(StockAgent.notify_channel_ids).where(
+                StockAgent.id == stock_agent_id
+            ).scalar_subquery()
+            sa_ids, agent_ids = db.execute(select(sa_ids_subq, agent_ids_subq)).one()
+        else:
+            sa_ids, agent_ids = None, db.execute(select(agent_ids_subq)).scalar()
+        channel_ids = sa_ids or agent_ids or None
 
         # 3. 按 id 列表查询或取系统默认
         if channel_ids:
@@ -574,8 +647,6 @@ def resolve_notify_channels(agent_name: str, stock_agent_id: int | None = None)
         for ch in channels:
             db.expunge(ch)
         return channels
-    finally:
-        db.close()
 
 
 def _build_notifier(channels: list[NotifyChannel]) -> NotifierManager:
@@ -587,7 +658,7 @@ def _build_notifier(channels: list[NotifyChannel]) -> NotifierManager:
 
 
 def _build_ai_client(model: AIModel | None, service: AIService | None, proxy: str) -> AIClient:
-    """根据解析后的 model+service 构建 AIClient"""
+    """根据解析后的 model+service 构建 AIClient（底层连接池由 AIClient 按连接参数共享）"""
     if model and service:
         return AIClient(
             base_url=service.base_url,
@@ -596,7 +667,7 @@ def _build_ai_client(model: AIModel | None, service: AIService | None, proxy: st
             proxy=proxy,
         )
     # 回退到环境变量配置
-    settings = Settings()
+    settings = get_settings()
     return AIClient(
         base_url=settings.ai_base_url,
         api_key=settings.ai_api_key,
@@ -605,16 +676,46 @@ def _build_ai_client(model: AIModel | None, service: AIService | None, proxy: st
     )
 
 
-def build_context(agent_name: str, stock_agent_id: int | None = None) -> AgentContext:
-    """为指定 Agent 构建运行上下文"""
-    settings = Settings()
-    watchlist = load_watchlist_for_agent(agent_name)
-    portfolio = load_portfolio_for_agent(agent_name)
-    proxy = _get_proxy() or settings.http_proxy
+def _log_trigger_info(agent_name: str, stocks: list, model: AIModel | None, service: AIService | None, channels: list[NotifyChannel]):
+    """打印 Agent 触发时的上下文信息"""
+    stock_names = ", ".join(f"{s.name}({s.symbol})" if hasattr(s, 'symbol') else str(s) for s in stocks)
+    ai_info = f"{service.name}/{model.model}" if model and service else "未配置"
+    channel_info = ", ".join(ch.name for ch in channels) if channels else "无"
+    logger.info(f"[触发] Agent={agent_name} | 股票=[{stock_names}] | AI={ai_info} | 通知=[{channel_info}]")
+
+
+def _stock_to_config(stock: Stock) -> StockConfig:
+    """Stock ORM 对象 → StockConfig（未知市场按 A 股处理）"""
+    try:
+        market = MarketCode(stock.market)
+    except ValueError:
+        market = MarketCode.CN
+    return StockConfig(symbol=stock.symbol, name=stock.name, market=market)
+
+
+def build_context(agent_name: str, stock_agent_id: int | None = None, stock: Stock | None = None) -> AgentContext:
+    """为指定 Agent 构建运行上下文
+
+    传入 stock 时只针对这一只股票（watchlist 仅含该股，持仓按该股加载），
+    否则加载 Agent 关联的全部自选股。
+    """
+    settings = get_settings()
+    # 所有查询共用一个 session，只占用一个连接
+    with session_scope() as db:
+        if stock is not None:
+            watchlist = [_stock_to_config(stock)]
+            portfolio = load_portfolio_for_stock(stock.id, db=db)
+        else:
+            watchlist = load_watchlist_for_agent(agent_name, db=db)
+            portfolio = load_portfolio_for_agent(agent_name, db=db)
+        proxy = _get_proxy(db=db) or settings.http_proxy
+        model, service = resolve_ai_model(agent_name, stock_agent_id, db=db)
+        channels = resolve_notify_channels(agent_name, stock_agent_id, db=db)
+
+    if watchlist:
+        _log_trigger_info(agent_name, watchlist, model, service, channels)
 
-    model, service = resolve_ai_model(agent_name, stock_agent_id)
     ai_client = _build_ai_client(model, service, proxy)
-    channels = resolve_notify_channels(agent_name, stock_agent_id)
     notifier = _build_notifier(channels)
 
     model_label = f"{service.name}/{model.model}" if model and service else ""
@@ -657,46 +758,23 @@ def build_scheduler() -> AgentScheduler:
                 logger.info(f"Agent {cfg.name} 未设置调度计划，跳过")
                 continue
 
-            agent_kwargs = cfg.config or {}
+            agent_kwargs, concurrency = split_agent_config(cfg.name, cfg.config)
             try:
                 agent_instance = agent_cls(**agent_kwargs) if agent_kwargs else agent_cls()
             except TypeError:
                 agent_instance = agent_cls()
-            sched.register(agent_instance, schedule=cfg.schedule, execution_mode=cfg.execution_mode or "batch")
+            sched.register(
+                agent_instance,
+                schedule=cfg.schedule,
+                execution_mode=cfg.execution_mode or "batch",
+                concurrency=concurrency,
+            )
     finally:
         db.close()
 
     return sched
 
 
-def _log_trigger_info(agent_name: str, stocks: list, model: AIModel | None, service: AIService | None, channels: list[NotifyChannel]):
-    """打印 Agent 触发时的上下文信息"""
-    stock_names = ", ".join(f"{s.name}({s.symbol})" if hasattr(s, 'symbol') else str(s) for s in stocks)
-    ai_info = f"{service.name}/{model.model}" if model and service else "未配置"
-    channel_info = ", ".join(ch.name for ch in channels) if channels else "无"
-    logger.info(f"[触发] Agent={agent_name} | 股票=[{stock_names}] | AI={ai_info} | 通知=[{channel_info}]")
-
-
-def get_agent_execution_mode(agent_name: str) -> str:
-    """获取 Agent 的执行模式"""
-    db = SessionLocal()
-    try:
-        agent = db.query(AgentConfig).filter(AgentConfig.name == agent_name).first()
-        return agent.execution_mode if agent and agent.execution_mode else "batch"
-    finally:
-        db.close()
-
-
-def get_agent_config(agent_name: str) -> dict:
-    """获取 Agent 的配置参数"""
-    db = SessionLocal()
-    try:
-        agent = db.query(AgentConfig).filter(AgentConfig.name == agent_name).first()
-        return agent.config if agent and agent.config else {}
-    finally:
-        db.close()
-
-
 async def trigger_agent(agent_name: str) -> str:
     """手动触发 Agent 执行（根据执行模式处理）"""
     start = time.monotonic()
@@ -704,30 +782,38 @@ async def trigger_agent(agent_name: str) -> str:
     if not agent_cls:
         raise ValueError(f"Agent {agent_name} 未注册实际实现")
 
-    watchlist = load_watchlist_for_agent(agent_name)
+    # 数据库查询为同步阻塞调用，放到线程中执行，避免阻塞事件循环
+    context = await asyncio.to_thread(build_context, agent_name)
+    watchlist = context.watchlist
     if not watchlist:
         return f"Agent {agent_name} 没有关联的自选股"
+    meta = await asyncio.to_thread(get_agent_meta, agent_name)
+    execution_mode = meta["execution_mode"]
 
-    model, service = resolve_ai_model(agent_name)
-    channels = resolve_notify_channels(agent_name)
-    _log_trigger_info(agent_name, watchlist, model, service, channels)
-
-    context = build_context(agent_name)
-    execution_mode = get_agent_execution_mode(agent_name)
-    agent_config = get_agent_config(agent_name)
-
-    # 根据配置初始化 Agent
-    if agent_config:
-        agent = agent_cls(**agent_config)
+    # 根据配置初始化 Agent（concurrency 为调度参数，不传给 Agent）
+    agent_kwargs, concurrency = split_agent_config(agent_name, meta["config"])
+    if agent_kwargs:
+        agent = agent_cls(**agent_kwargs)
     else:
         agent = agent_cls()
 
     try:
         if execution_mode == "single" and hasattr(agent, "run_single"):
-            # 单只模式：逐只股票分析
+            # 单只模式：逐只股票并发分析，信号量限制同时进行的 AI 调用数
+            sem = asyncio.Semaphore(concurrency)
+
+            async def run_one(stock):
+                async with sem:
+                    # run_single 会临时改写 watchlist，每个任务使用独立的 context 副本
+                    stock_context = replace(context, config=replace(context.config))
+                    return await agent.run_single(stock_context, stock.symbol)
+
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(run_one(stock)) for stock in watchlist]
+
             results = []
-            for stock in watchlist:
-                result = await agent.run_single(context, stock.symbol)
+            for stock, task in zip(watchlist, tasks):
+                result = task.result()
                 if result:
                     results.append(f"{stock.name}: {result.content[:100]}...")
             msg = "\n\n".join(results) if results else "无异动"
@@ -749,13 +835,16 @@ async def trigger_agent(agent_name: str) -> str:
             )
             return result.content
     except Exception as e:
+        # TaskGroup 会把子任务异常包装为 ExceptionGroup，取首个原始异常
+        if isinstance(e, ExceptionGroup):
+            e = e.exceptions[0]
         record_agent_run(
             agent_name=agent_name,
             status="failed",
             error=str(e),
             duration_ms=int((time.monotonic() - start) * 1000),
         )
-        raise
+        raise e
 
 
 async def trigger_agent_for_stock(
@@ -770,39 +859,8 @@ async def trigger_agent_for_stock(
     if not agent_cls:
         raise ValueError(f"Agent {agent_name} 未注册实际实现")
 
-    settings = Settings()
-    proxy = _get_proxy() or settings.http_proxy
-
-    try:
-        market = MarketCode(stock.market)
-    except ValueError:
-        market = MarketCode.CN
-
-    stock_config = StockConfig(
-        symbol=stock.symbol,
-        name=stock.name,
-        market=market,
-    )
-
-    # 加载该股票的持仓信息
-    portfolio = load_portfolio_for_stock(stock.id)
-
-    model, service = resolve_ai_model(agent_name, stock_agent_id)
-    channels = resolve_notify_channels(agent_name, stock_agent_id)
-    _log_trigger_info(agent_name, [stock], model, service, channels)
-
-    ai_client = _build_ai_client(model, service, proxy)
-    notifier = _build_notifier(channels)
-
-    model_label = f"{service.name}/{model.model}" if model and service else ""
-    config = AppConfig(settings=settings, watchlist=[stock_config])
-    context = AgentContext(
-        ai_client=ai_client,
-        notifier=notifier,
-        config=config,
-        portfolio=portfolio,
-        model_label=model_label,
-    )
+    # 与 trigger_agent 共用 build_context，仅把 watchlist/持仓限定为这一只股票
+    context = await asyncio.to_thread(build_context, agent_name, stock_agent_id, stock)
 
     # 创建 agent，支持 bypass_throttle 参数
     if agent_name == "intraday_monitor" and bypass_throttle:
@@ -840,32 +898,49 @@ async def trigger_agent_for_stock(
 async def lifespan(app):
     """应用生命周期: 初始化 + 启动调度器"""
     init_db()
-    setup_logging()
+    log_listener = setup_logging()
+    # 同步路由运行在 anyio 线程池（默认 40），放宽到与数据库连接池上限一致
+    anyio_to_thread.current_default_thread_limiter().total_tokens = MAX_DB_CONNECTIONS
     setup_ssl()
-    setup_playwright()
+
+    # 后台线程无法通过取消 asyncio 任务中止，关闭时设置该事件通知线程尽快退出
+    background_stop = threading.Event()
+
+    # Playwright 首次安装可能耗时数分钟，放到后台线程执行，不阻塞服务启动
+    from src.collectors.screenshot_collector import set_browser_setup_task
+    playwright_task = asyncio.create_task(asyncio.to_thread(setup_playwright, background_stop))
+    set_browser_setup_task(playwright_task)
 
     # 从环境变量初始化认证（Docker 部署用）
-    from src.web.api.auth import init_auth_from_env
+    from src.web.api.auth import init_auth_from_env, get_jwt_secret
     db = SessionLocal()
     try:
         if init_auth_from_env(db):
             logger.info("已从环境变量初始化认证账号")
     finally:
         db.close()
+    # 启动时即加载（首次则生成并持久化）JWT 签名密钥
+    get_jwt_secret()
 
     seed_agents()
     seed_data_sources()
     seed_sample_stocks()
 
     # 后台刷新股票列表缓存
-    import threading
     from src.web.stock_list import get_stock_list, refresh_stock_list
     def refresh_stock_cache():
-        stocks = get_stock_list()
+        stocks = get_stock_list(background_stop)
+        if background_stop.is_set():
+            return
         if not stocks or len([s for s in stocks if s['market'] == 'CN']) == 0:
             logger.info("股票列表缓存为空或缺少 A 股，后台刷新中...")
-            refresh_stock_list()
-    threading.Thread(target=refresh_stock_cache, daemon=True).start()
+            refresh_stock_list(background_stop)
+    refresh_task = asyncio.create_task(asyncio.to_thread(refresh_stock_cache))
+
+    # 汇率、持仓行情查询共享 HTTP 客户端（复用连接）
+    from src.web.api.accounts import create_fx_client, create_quote_client
+    app.state.fx_client = create_fx_client()
+    app.state.quote_client = create_quote_client()
 
     global scheduler
     scheduler = build_scheduler()
@@ -874,6 +949,12 @@ async def lifespan(app):
     yield
     scheduler.shutdown()
     logger.info("Agent 调度器已关闭")
+    await app.state.fx_client.aclose()
+    await app.state.quote_client.aclose()
+    # 通知后台线程停止并等待其退出（正在进行的单个 HTTP 请求仍需等待其超时或完成）
+    background_stop.set()
+    await asyncio.wait((playwright_task, refresh_task), timeout=BACKGROUND_STOP_TIMEOUT)
+    log_listener.stop()
 
 
 # 模块级 app 实例，供 uvicorn reload 使用
@@ -886,7 +967,12 @@ if os.path.exists(static_dir):
     from fastapi.staticfiles import StaticFiles
     from fastapi.responses import FileResponse
 
-    # SPA 路由：所有非 API 请求返回 index.html
+    # Vite 构建产物（带哈希的 js/css 等）直接交给 StaticFiles 处理，不经过 SPA 路由
+    assets_dir = os.path.join(static_dir, "assets")
+    if os.path.isdir(assets_dir):
+        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+
+    # SPA 路由：根目录下的公共文件（图标、manifest 等）直接返回，其余返回 index.html
     @app.get("/{path:path}")
     async def serve_spa(path: str):
         file_path = os.path.join(static_dir, path)
@@ -900,11 +986,15 @@ if os.path.exists(static_dir):
 if __name__ == "__main__":
     print("盯盘侠启动: http://127.0.0.1:8000")
     print("API 文档: http://127.0.0.1:8000/docs")
-    uvicorn.run(
-        "server:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        reload_dirs=["src", "."],
-        reload_excludes=["data/*", "frontend/*", ".claude/*"],
-    )
+    # 热重载仅在开发时开启（DEV=1）
+    run_kwargs = {}
+    if os.environ.get("DEV") == "1":
+        run_kwargs.update(
+            reload=True,
+            reload_dirs=["src", "."],
+            reload_excludes=["data/*", "frontend/*", ".claude/*"],
+        )
+    # uvloop 不支持 Windows，该平台使用 uvicorn 默认的 asyncio 事件循环
+    if sys.platform != "win32":
+        run_kwargs.update(loop="uvloop", http="httptools")
+    uvicorn.run("server:app", host="0.0.0.0", port=8000, **run_kwargs)
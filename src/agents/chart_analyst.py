@@ -29,7 +29,6 @@ class ChartAnalystAgent(BaseAgent):
             period: K线周期 (daily/weekly/monthly)
         """
         self.period = period
-        self._collector: ScreenshotCollector | None = None
 
     async def collect(self, context: AgentContext) -> dict:
         """采集自选股 K 线图截图"""
@@ -47,13 +46,13 @@ class ChartAnalystAgent(BaseAgent):
             for stock in context.watchlist
         ]
 
-        # 截图
-        self._collector = ScreenshotCollector()
+        # 截图（每次采集使用独立的 collector，支持多只股票并发执行）
+        collector = ScreenshotCollector()
         try:
-            screenshots = await self._collector.capture_batch(stocks, period=self.period)
+            screenshots = await collector.capture_batch(stocks, period=self.period)
 
             # 清理旧截图
-            self._collector.cleanup_old_screenshots(max_age_hours=24)
+            collector.cleanup_old_screenshots(max_age_hours=24)
 
             return {
                 "screenshots": screenshots,
@@ -62,8 +61,7 @@ class ChartAnalystAgent(BaseAgent):
                 "timestamp": datetime.now().isoformat(),
             }
         finally:
-            await self._collector.close()
-            self._collector = None
+            await collector.close()
 
     def build_prompt(self, data: dict, context: AgentContext) -> tuple[str, str]:
         """构建技术分析 Prompt"""
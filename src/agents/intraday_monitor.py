@@ -1,11 +1,14 @@
 """盘中监测 Agent - 实时监控持仓，AI 判断是否需要提醒"""
+import asyncio
 import logging
 import re
+import threading
+import time
 from datetime import datetime, timedelta, date
 from pathlib import Path
 
 from src.agents.base import BaseAgent, AgentContext, AnalysisResult
-from src.collectors.akshare_collector import AkshareCollector
+from src.collectors.akshare_collector import fetch_quotes
 from src.collectors.kline_collector import KlineCollector
 from src.core.analysis_history import get_latest_analysis, get_analysis
 from src.core.suggestion_pool import save_suggestion
@@ -33,6 +36,170 @@ SUGGESTION_TYPES = {
 }
 
 PROMPT_PATH = Path(__file__).parent.parent.parent / "prompts" / "intraday_monitor.txt"
+# 盘中监测按股票高频调用，系统提示词在导入时读取一次
+_SYSTEM_PROMPT = PROMPT_PATH.read_text(encoding="utf-8")
+
+
+def _field_patterns(field: str) -> list[re.Pattern]:
+    """AI 响应字段的解析正则（支持「信号」/**信号**/信号: 多种格式）"""
+    return [
+        re.compile(rf"「{field}」\s*[:：]?\s*(.+?)(?=「|$|\n\n)", re.DOTALL),
+        re.compile(rf"\*\*{field}\*\*\s*[:：]?\s*(.+?)(?=\*\*|$|\n\n)", re.DOTALL),
+        re.compile(rf"{field}\s*[:：]\s*(.+?)(?=\n|$)", re.DOTALL),
+    ]
+
+
+# 解析正则在模块加载时预编译
+_SIGNAL_PATTERNS = _field_patterns("信号")
+_SUGGEST_PATTERNS = _field_patterns("建议")
+_REASON_PATTERNS = _field_patterns("理由")
+_MD_STRIP = re.compile(r"\*\*|##|#")
+# 一次扫描找出最先出现的操作建议关键词
+_SUGGESTION_RE = re.compile("|".join(map(re.escape, SUGGESTION_TYPES)))
+
+
+def _search_field(field: str, patterns: list[re.Pattern], content: str) -> re.Match | None:
+    """按顺序尝试各格式的正则；正文不含字段名时直接跳过，省去逐个正则匹配"""
+    if field not in content:
+        return None
+    for pattern in patterns:
+        match = pattern.search(content)
+        if match:
+            return match
+    return None
+
+
+_STYLE_LABELS = {"short": "短线", "swing": "波段", "long": "长线"}
+
+# 按市场复用 K 线采集器实例
+_KLINE_COLLECTORS: dict[MarketCode, KlineCollector] = {}
+
+
+def _get_kline_collector(market: MarketCode) -> KlineCollector:
+    collector = _KLINE_COLLECTORS.get(market)
+    if collector is None:
+        collector = _KLINE_COLLECTORS.setdefault(market, KlineCollector(market))
+    return collector
+
+
+def _safe_num(value, default=0):
+    """安全获取数值，None 转为默认值"""
+    return value if value is not None else default
+
+
+def _format_num(value, precision=2) -> str:
+    if value is None:
+        return "N/A"
+    return f"{value:.{precision}f}"
+
+
+def _format_quote(stock: StockData) -> str:
+    """股票行情段落"""
+    volume = _safe_num(stock.volume)
+    turnover = _safe_num(stock.turnover)
+    text = (
+        "## 股票行情\n"
+        f"- 股票：{stock.name}（{stock.symbol}）\n"
+        f"- 现价：{_safe_num(stock.current_price):.2f}\n"
+        f"- 涨跌幅：{_safe_num(stock.change_pct):+.2f}%\n"
+        f"- 涨跌额：{_safe_num(stock.change_amount):+.2f}\n"
+        f"- 今开：{_safe_num(stock.open_price):.2f}\n"
+        f"- 最高：{_safe_num(stock.high_price):.2f}\n"
+        f"- 最低：{_safe_num(stock.low_price):.2f}\n"
+        f"- 昨收：{_safe_num(stock.prev_close):.2f}"
+    )
+    if volume > 0:
+        text += f"\n- 成交量：{volume:.0f} 手"
+    if turnover > 0:
+        text += f"\n- 成交额：{turnover / 10000:.0f} 万"
+    return text
+
+
+def _format_funds(portfolio) -> str:
+    """账户资金段落"""
+    return "\n".join([
+        "\n## 账户资金",
+        f"- 总可用资金：{portfolio.total_available_funds:.0f} 元",
+        *(f"  - {acc.name}：{acc.available_funds:.0f} 元" for acc in portfolio.accounts),
+    ])
+
+
+def truncate_history(text: str | None, limit: int = 300) -> str | None:
+    """历史分析摘要截取（最多 300 字）。内容当天固定，应在加载时截取一次"""
+    if text is None:
+        return None
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def _format_history(daily_analysis: str | None, premarket_analysis: str | None) -> str:
+    """历史分析参考段落（传入内容应已经 truncate_history 截取），都没有时返回空串"""
+    if not daily_analysis and not premarket_analysis:
+        return ""
+    parts = ["\n## 历史分析参考"]
+    if daily_analysis:
+        parts += ["\n### 昨日盘后分析摘要", daily_analysis]
+    if premarket_analysis:
+        parts += ["\n### 今日盘前分析摘要", premarket_analysis]
+    return "\n".join(parts)
+
+
+async def _fetch_market_quotes(market_code: MarketCode, symbols: list[str]) -> list[StockData]:
+    """采集单个市场行情；失败只记录日志并返回空列表，不影响其他市场"""
+    try:
+        return await fetch_quotes(market_code, symbols)
+    except Exception as e:
+        logger.error(f"采集 {market_code.value} 行情失败: {e}")
+        return []
+
+
+async def _collect_quotes(market_symbols: dict[MarketCode, list[str]]) -> list[StockData]:
+    """各市场行情并发采集，按市场顺序合并结果"""
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(_fetch_market_quotes(mc, symbols)) for mc, symbols in market_symbols.items()]
+    return [stock for task in tasks for stock in task.result()]
+
+
+# (agent_name, 日期) -> (过期时间, 已截取的历史分析摘要)。盘中每只股票每轮都要读取同样的两条记录，
+# 短期缓存；当天重新生成的分析最迟在 TTL 后生效。尚未生成（None）时不缓存，下次继续查询。
+# 两个加载函数会在不同线程中并发调用，读写需加锁
+ANALYSIS_CACHE_TTL = 300  # 秒
+_analysis_cache: dict[tuple[str, date], tuple[float, str]] = {}
+_analysis_cache_lock = threading.Lock()
+
+
+def _load_daily_analysis(today: date) -> str | None:
+    """今天之前最近一次盘后日报摘要"""
+    return _cached_analysis(
+        ("daily_report", today),
+        lambda: get_latest_analysis(agent_name="daily_report", stock_symbol="*", before_date=today),
+    )
+
+
+def _load_premarket_analysis(today: date) -> str | None:
+    """今日盘前分析摘要"""
+    return _cached_analysis(
+        ("premarket_outlook", today),
+        lambda: get_analysis(agent_name="premarket_outlook", stock_symbol="*", analysis_date=today),
+    )
+
+
+def _cached_analysis(key: tuple[str, date], fetch) -> str | None:
+    """优先读缓存；未命中或已过期时查询，截取摘要后写入缓存"""
+    with _analysis_cache_lock:
+        entry = _analysis_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    record = fetch()
+    if not record:
+        return None
+    summary = truncate_history(record.content)
+    with _analysis_cache_lock:
+        # 跨天后清理旧日期的缓存
+        for stale in [k for k in _analysis_cache if k[1] != key[1]]:
+            del _analysis_cache[stale]
+        _analysis_cache[key] = (time.monotonic() + ANALYSIS_CACHE_TTL, summary)
+    return summary
 
 
 class IntradayMonitorAgent(BaseAgent):
@@ -74,256 +241,223 @@ class IntradayMonitorAgent(BaseAgent):
         self.volume_alert_ratio = volume_alert_ratio
         self.stop_loss_warning = stop_loss_warning
         self.take_profit_warning = take_profit_warning
+        # symbol -> 最近一次通知时间；节流窗口内的重复检查无需访问数据库
+        self._throttle_cache: dict[str, datetime] = {}
 
-    async def collect(self, context: AgentContext) -> dict:
-        """采集实时行情 + K线 + 历史分析"""
+    async def collect(self, context: AgentContext, stock_symbol: str | None = None) -> dict:
+        """采集实时行情 + K线 + 历史分析
+
+        Args:
+            stock_symbol: 单只模式下只采集该股票（不传则采集整个 watchlist）
+        """
         # 检查是否在交易时段
         if not is_any_market_trading():
             logger.info("当前非交易时段，跳过盘中监测")
             return {"stocks": [], "stock_data": None, "skip_reason": "非交易时段"}
 
-        if not context.watchlist:
+        watchlist = context.watchlist
+        if stock_symbol is not None:
+            watchlist = [s for s in watchlist if s.symbol == stock_symbol]
+        if not watchlist:
             logger.warning("自选股列表为空，跳过盘中监测")
             return {"stocks": [], "stock_data": None}
 
         # 按市场分组采集
         market_symbols: dict[MarketCode, list[str]] = {}
-        for stock in context.watchlist:
+        for stock in watchlist:
             market_symbols.setdefault(stock.market, []).append(stock.symbol)
 
-        all_stocks: list[StockData] = []
-        for market_code, symbols in market_symbols.items():
-            collector = AkshareCollector(market_code)
-            try:
-                stocks = await collector.get_stock_data(symbols)
-                all_stocks.extend(stocks)
-            except Exception as e:
-                logger.error(f"采集 {market_code.value} 行情失败: {e}")
+        # 行情、K 线、历史分析互不依赖，全部并发执行（同步调用放到线程中）
+        # 单只模式下只有一只股票，K 线可直接按其代码预先拉取
+        stock_config = watchlist[0]
+        # 本次采集统一使用同一时间基准
+        now = datetime.now()
+        today = now.date()
+        quotes, kline_summary, daily_analysis, premarket_analysis = await asyncio.gather(
+            _collect_quotes(market_symbols),
+            asyncio.to_thread(self._get_kline_summary, stock_config),
+            # 获取历史分析（为 AI 提供更多上下文）
+            asyncio.to_thread(_load_daily_analysis, today),
+            asyncio.to_thread(_load_premarket_analysis, today),
+        )
+
+        all_stocks: list[StockData] = quotes
 
         # 单只模式下只有一只股票
         stock_data = all_stocks[0] if all_stocks else None
-
-        # 采集 K 线和技术指标
-        kline_summary = None
-        if stock_data:
-            try:
-                stock_config = context.watchlist[0] if context.watchlist else None
-                market = stock_config.market if stock_config else MarketCode.CN
-                kline_collector = KlineCollector(market)
-                kline_summary = kline_collector.get_kline_summary(stock_data.symbol)
-            except Exception as e:
-                logger.warning(f"获取 K 线数据失败: {e}")
-
-        # 获取历史分析（为 AI 提供更多上下文）
-        daily_analysis = get_latest_analysis(
-            agent_name="daily_report",
-            stock_symbol="*",
-            before_date=date.today(),
-        )
-        premarket_analysis = get_analysis(
-            agent_name="premarket_outlook",
-            stock_symbol="*",
-            analysis_date=date.today(),
-        )
+        if not stock_data:
+            kline_summary = None
+        elif (stock_data.symbol, stock_data.market) != (stock_config.symbol, stock_config.market):
+            # 预取 K 线的股票没有行情时，改为按实际分析的股票重新获取，避免行情与技术指标错配
+            kline_summary = await asyncio.to_thread(self._get_kline_summary, stock_data)
 
         return {
             "stocks": all_stocks,
             "stock_data": stock_data,
             "kline_summary": kline_summary,
-            "daily_analysis": daily_analysis.content if daily_analysis else None,
-            "premarket_analysis": premarket_analysis.content if premarket_analysis else None,
-            "timestamp": datetime.now().isoformat(),
+            "daily_analysis": daily_analysis,
+            "premarket_analysis": premarket_analysis,
+            "timestamp": now.isoformat(),
         }
 
-    def build_prompt(self, data: dict, context: AgentContext) -> tuple[str, str]:
-        """构建盘中分析 Prompt"""
-        system_prompt = PROMPT_PATH.read_text(encoding="utf-8")
-
-        # 辅助函数：安全获取数值，None 转为默认值
-        def safe_num(value, default=0):
-            return value if value is not None else default
+    def _get_kline_summary(self, stock_config) -> dict | None:
+        """采集 K 线和技术指标（同步调用，失败返回 None）"""
+        try:
+            return _get_kline_collector(stock_config.market).get_kline_summary(stock_config.symbol)
+        except Exception as e:
+            logger.warning(f"获取 K 线数据失败: {e}")
+            return None
 
-        def format_num(value, precision=2):
-            if value is None:
-                return "N/A"
-            return f"{value:.{precision}f}"
+    def build_prompt(self, data: dict, context: AgentContext) -> tuple[str, str]:
+        """构建盘中分析 Prompt（各段落由 _format_* 生成后一次拼接）"""
+        system_prompt = _SYSTEM_PROMPT
 
         stock: StockData | None = data.get("stock_data")
         if not stock:
             return system_prompt, "无股票数据"
 
-        # 获取所有账户的持仓信息
-        positions = context.portfolio.get_positions_for_stock(stock.symbol)
-        style_labels = {"short": "短线", "swing": "波段", "long": "长线"}
-
-        lines = []
-        lines.append(f"## 时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
-
-        # 股票行情
-        current_price = safe_num(stock.current_price)
-        change_pct = safe_num(stock.change_pct)
-        change_amount = safe_num(stock.change_amount)
-        open_price = safe_num(stock.open_price)
-        high_price = safe_num(stock.high_price)
-        low_price = safe_num(stock.low_price)
-        prev_close = safe_num(stock.prev_close)
-        volume = safe_num(stock.volume)
-        turnover = safe_num(stock.turnover)
-
-        lines.append("## 股票行情")
-        lines.append(f"- 股票：{stock.name}（{stock.symbol}）")
-        lines.append(f"- 现价：{current_price:.2f}")
-        lines.append(f"- 涨跌幅：{change_pct:+.2f}%")
-        lines.append(f"- 涨跌额：{change_amount:+.2f}")
-        lines.append(f"- 今开：{open_price:.2f}")
-        lines.append(f"- 最高：{high_price:.2f}")
-        lines.append(f"- 最低：{low_price:.2f}")
-        lines.append(f"- 昨收：{prev_close:.2f}")
-        if volume > 0:
-            lines.append(f"- 成交量：{volume:.0f} 手")
-        if turnover > 0:
-            lines.append(f"- 成交额：{turnover / 10000:.0f} 万")
-
-        # 系统阈值（帮助 AI 做出更稳定的“提醒/不提醒”判断）
-        lines.append("\n## 系统阈值")
-        lines.append(f"- 价格异动：|涨跌幅| ≥ {self.price_alert_threshold:.1f}%")
-        lines.append(f"- 量能异动：量比 ≥ {self.volume_alert_ratio:.1f}")
-        lines.append(f"- 止损预警：浮亏 ≤ {self.stop_loss_warning:.1f}%")
-        lines.append(f"- 止盈提醒：浮盈 ≥ {self.take_profit_warning:.1f}%")
+        current_price = _safe_num(stock.current_price)
+        sections = [
+            f"## 时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}\n",
+            _format_quote(stock),
+            self._format_thresholds(_safe_num(stock.change_pct)),
+            self._format_kline(data.get("kline_summary")),
+            _format_funds(context.portfolio),
+            # 获取所有账户的持仓信息
+            self._format_positions(
+                context.portfolio.get_positions_for_stock(stock.symbol), current_price, context.portfolio
+            ),
+            # 历史分析上下文（帮助 AI 做出更好的判断）
+            _format_history(data.get("daily_analysis"), data.get("premarket_analysis")),
+            "\n请结合技术分析、资金情况和历史分析，给出明确的操作建议。",
+        ]
+        user_content = "\n".join(section for section in sections if section)
+        return system_prompt, user_content
+
+    def _format_thresholds(self, change_pct: float) -> str:
+        """系统阈值（帮助 AI 做出更稳定的“提醒/不提醒”判断）"""
         price_hit = "触发" if abs(change_pct) >= self.price_alert_threshold else "未触发"
-        lines.append(f"- 当前涨跌幅：{change_pct:+.2f}%（{price_hit}）")
+        return (
+            "\n## 系统阈值\n"
+            f"- 价格异动：|涨跌幅| ≥ {self.price_alert_threshold:.1f}%\n"
+            f"- 量能异动：量比 ≥ {self.volume_alert_ratio:.1f}\n"
+            f"- 止损预警：浮亏 ≤ {self.stop_loss_warning:.1f}%\n"
+            f"- 止盈提醒：浮盈 ≥ {self.take_profit_warning:.1f}%\n"
+            f"- 当前涨跌幅：{change_pct:+.2f}%（{price_hit}）"
+        )
 
-        # K 线和技术指标
-        kline = data.get("kline_summary")
-        if kline and not kline.get("error"):
-            lines.append("\n## 技术分析")
+    def _format_kline(self, kline: dict | None) -> str:
+        """K 线和技术指标，无数据时返回空串"""
+        if not kline or kline.get("error"):
+            return ""
 
+        recent_5_up = kline.get('recent_5_up', 0)
+        parts = [
+            "\n## 技术分析",
             # 基础趋势
-            lines.append(f"- 趋势：{kline.get('trend', 'N/A')}")
-            lines.append(f"- 近5日：{kline.get('recent_5_up', 0)}涨{5-kline.get('recent_5_up', 0)}跌")
-            lines.append(f"- 5日涨幅：{format_num(kline.get('change_5d'))}% | 20日涨幅：{format_num(kline.get('change_20d'))}%")
-
-            # MACD
-            macd_info = f"MACD：{kline.get('macd_status', 'N/A')}"
-            if kline.get('macd_cross_days'):
-                macd_info += f"（{kline.get('macd_cross_days')}日前）"
-            lines.append(f"- {macd_info}")
-
-            # RSI
-            rsi_status = kline.get('rsi_status')
-            rsi6 = kline.get('rsi6')
-            if rsi_status and rsi6 is not None:
-                lines.append(f"- RSI(6)：{rsi6:.1f}（{rsi_status}）")
-
-            # KDJ
-            kdj_status = kline.get('kdj_status')
-            kdj_k, kdj_d, kdj_j = kline.get('kdj_k'), kline.get('kdj_d'), kline.get('kdj_j')
-            if kdj_status and kdj_k is not None:
-                lines.append(f"- KDJ：K={kdj_k:.1f} D={kdj_d:.1f} J={kdj_j:.1f}（{kdj_status}）")
-
-            # 布林带
-            boll_status = kline.get('boll_status')
-            boll_upper, boll_lower = kline.get('boll_upper'), kline.get('boll_lower')
-            if boll_status and boll_upper is not None:
-                lines.append(f"- 布林带：上轨={format_num(boll_upper)} 下轨={format_num(boll_lower)}（{boll_status}）")
-
-            # 量能
-            volume_trend = kline.get('volume_trend')
-            volume_ratio = kline.get('volume_ratio')
-            if volume_trend:
-                vol_info = f"量能：{volume_trend}"
-                if volume_ratio:
-                    vol_info += f"（量比={volume_ratio:.2f}）"
-                lines.append(f"- {vol_info}")
-                if volume_ratio:
-                    vol_hit = "触发" if volume_ratio >= self.volume_alert_ratio else "未触发"
-                    lines.append(f"- 量比阈值判断：{vol_hit}")
-
-            # 均线
-            lines.append(f"- MA5：{format_num(kline.get('ma5'))} | MA10：{format_num(kline.get('ma10'))} | MA20：{format_num(kline.get('ma20'))} | MA60：{format_num(kline.get('ma60'))}")
-
-            # 多级支撑压力
-            support_m, resistance_m = kline.get('support_m'), kline.get('resistance_m')
-            if support_m and resistance_m:
-                lines.append(f"- 中期支撑：{format_num(support_m)} | 中期压力：{format_num(resistance_m)}")
-
-            support_s, resistance_s = kline.get('support_s'), kline.get('resistance_s')
-            if support_s and resistance_s:
-                lines.append(f"- 短期支撑：{format_num(support_s)} | 短期压力：{format_num(resistance_s)}")
-
-            # K线形态
-            kline_pattern = kline.get('kline_pattern')
-            if kline_pattern:
-                lines.append(f"- K线形态：{kline_pattern}")
-
-            # 振幅
-            amplitude = kline.get('amplitude')
-            amplitude_avg5 = kline.get('amplitude_avg5')
-            if amplitude is not None:
-                amp_info = f"今日振幅：{amplitude:.2f}%"
-                if amplitude_avg5 is not None:
-                    amp_info += f"（5日平均：{amplitude_avg5:.2f}%）"
-                lines.append(f"- {amp_info}")
-
-        # 账户资金情况
-        lines.append(f"\n## 账户资金")
-        lines.append(f"- 总可用资金：{context.portfolio.total_available_funds:.0f} 元")
-        for acc in context.portfolio.accounts:
-            lines.append(f"  - {acc.name}：{acc.available_funds:.0f} 元")
-
-        # 各账户持仓信息
-        if positions:
-            lines.append(f"\n## 持仓情况（共 {len(positions)} 个账户）")
-            for i, pos in enumerate(positions, 1):
-                cost_price = safe_num(pos.cost_price, 1)
-                pnl_pct = (current_price - cost_price) / cost_price * 100 if cost_price > 0 else 0
-                style_label = style_labels.get(pos.trading_style, "波段")
-                market_value = current_price * pos.quantity
-                # 找到对应账户的可用资金
-                acc_funds = 0
-                for acc in context.portfolio.accounts:
-                    if acc.id == pos.account_id:
-                        acc_funds = acc.available_funds
-                        break
-
-                lines.append(f"\n### 持仓 {i}：{pos.account_name}")
-                lines.append(f"- 交易风格：{style_label}")
-                lines.append(f"- 成本价：{cost_price:.2f}")
-                lines.append(f"- 持仓量：{pos.quantity} 股")
-                lines.append(f"- 持仓市值：{market_value:.0f} 元")
-                pnl_note = ""
-                if pnl_pct <= self.stop_loss_warning:
-                    pnl_note = "（触发止损预警）"
-                elif pnl_pct >= self.take_profit_warning:
-                    pnl_note = "（触发止盈提醒）"
-                lines.append(f"- 浮动盈亏：{pnl_pct:+.1f}%{pnl_note}")
-                lines.append(f"- 账户可用：{acc_funds:.0f} 元")
-        else:
-            lines.append("\n## 未持仓（仅关注）")
-            lines.append(f"- 可用资金充足，可考虑建仓")
-
-        # 历史分析上下文（帮助 AI 做出更好的判断）
-        daily_analysis = data.get("daily_analysis")
-        premarket_analysis = data.get("premarket_analysis")
-
-        if daily_analysis or premarket_analysis:
-            lines.append("\n## 历史分析参考")
-
-            if daily_analysis:
-                # 截取与当前股票相关的部分（最多 300 字）
-                content = daily_analysis[:300] + "..." if len(daily_analysis) > 300 else daily_analysis
-                lines.append(f"\n### 昨日盘后分析摘要")
-                lines.append(content)
-
-            if premarket_analysis:
-                content = premarket_analysis[:300] + "..." if len(premarket_analysis) > 300 else premarket_analysis
-                lines.append(f"\n### 今日盘前分析摘要")
-                lines.append(content)
+            f"- 趋势：{kline.get('trend', 'N/A')}",
+            f"- 近5日：{recent_5_up}涨{5 - recent_5_up}跌",
+            f"- 5日涨幅：{_format_num(kline.get('change_5d'))}% | 20日涨幅：{_format_num(kline.get('change_20d'))}%",
+        ]
 
-        lines.append("\n请结合技术分析、资金情况和历史分析，给出明确的操作建议。")
+        # MACD
+        macd_info = f"MACD：{kline.get('macd_status', 'N/A')}"
+        if kline.get('macd_cross_days'):
+            macd_info += f"（{kline.get('macd_cross_days')}日前）"
+        parts.append(f"- {macd_info}")
+
+        # RSI
+        rsi_status = kline.get('rsi_status')
+        rsi6 = kline.get('rsi6')
+        if rsi_status and rsi6 is not None:
+            parts.append(f"- RSI(6)：{rsi6:.1f}（{rsi_status}）")
+
+        # KDJ
+        kdj_status = kline.get('kdj_status')
+        kdj_k, kdj_d, kdj_j = kline.get('kdj_k'), kline.get('kdj_d'), kline.get('kdj_j')
+        if kdj_status and kdj_k is not None:
+            parts.append(f"- KDJ：K={kdj_k:.1f} D={kdj_d:.1f} J={kdj_j:.1f}（{kdj_status}）")
+
+        # 布林带
+        boll_status = kline.get('boll_status')
+        boll_upper, boll_lower = kline.get('boll_upper'), kline.get('boll_lower')
+        if boll_status and boll_upper is not None:
+            parts.append(f"- 布林带：上轨={_format_num(boll_upper)} 下轨={_format_num(boll_lower)}（{boll_status}）")
+
+        # 量能
+        volume_trend = kline.get('volume_trend')
+        volume_ratio = kline.get('volume_ratio')
+        if volume_trend:
+            vol_info = f"量能：{volume_trend}"
+            if volume_ratio:
+                vol_info += f"（量比={volume_ratio:.2f}）"
+            parts.append(f"- {vol_info}")
+            if volume_ratio:
+                vol_hit = "触发" if volume_ratio >= self.volume_alert_ratio else "未触发"
+                parts.append(f"- 量比阈值判断：{vol_hit}")
+
+        # 均线
+        parts.append(
+            f"- MA5：{_format_num(kline.get('ma5'))} | MA10：{_format_num(kline.get('ma10'))} | "
+            f"MA20：{_format_num(kline.get('ma20'))} | MA60：{_format_num(kline.get('ma60'))}"
+        )
 
-        user_content = "\n".join(lines)
-        return system_prompt, user_content
+        # 多级支撑压力
+        support_m, resistance_m = kline.get('support_m'), kline.get('resistance_m')
+        if support_m and resistance_m:
+            parts.append(f"- 中期支撑：{_format_num(support_m)} | 中期压力：{_format_num(resistance_m)}")
+
+        support_s, resistance_s = kline.get('support_s'), kline.get('resistance_s')
+        if support_s and resistance_s:
+            parts.append(f"- 短期支撑：{_format_num(support_s)} | 短期压力：{_format_num(resistance_s)}")
+
+        # K线形态
+        kline_pattern = kline.get('kline_pattern')
+        if kline_pattern:
+            parts.append(f"- K线形态：{kline_pattern}")
+
+        # 振幅
+        amplitude = kline.get('amplitude')
+        amplitude_avg5 = kline.get('amplitude_avg5')
+        if amplitude is not None:
+            amp_info = f"今日振幅：{amplitude:.2f}%"
+            if amplitude_avg5 is not None:
+                amp_info += f"（5日平均：{amplitude_avg5:.2f}%）"
+            parts.append(f"- {amp_info}")
+
+        return "\n".join(parts)
+
+    def _format_positions(self, positions: list, current_price: float, portfolio) -> str:
+        """各账户持仓信息，未持仓时给出建仓提示"""
+        if not positions:
+            return "\n## 未持仓（仅关注）\n- 可用资金充足，可考虑建仓"
+
+        accounts_by_id = {acc.id: acc for acc in portfolio.accounts}
+        parts = [f"\n## 持仓情况（共 {len(positions)} 个账户）"]
+        for i, pos in enumerate(positions, 1):
+            cost_price = _safe_num(pos.cost_price, 1)
+            pnl_pct = (current_price - cost_price) / cost_price * 100 if cost_price > 0 else 0
+            style_label = _STYLE_LABELS.get(pos.trading_style, "波段")
+            market_value = current_price * pos.quantity
+            # 对应账户的可用资金
+            acc = accounts_by_id.get(pos.account_id)
+            acc_funds = acc.available_funds if acc else 0
+
+            pnl_note = ""
+            if pnl_pct <= self.stop_loss_warning:
+                pnl_note = "（触发止损预警）"
+            elif pnl_pct >= self.take_profit_warning:
+                pnl_note = "（触发止盈提醒）"
+            parts.append(
+                f"\n### 持仓 {i}：{pos.account_name}\n"
+                f"- 交易风格：{style_label}\n"
+                f"- 成本价：{cost_price:.2f}\n"
+                f"- 持仓量：{pos.quantity} 股\n"
+                f"- 持仓市值：{market_value:.0f} 元\n"
+                f"- 浮动盈亏：{pnl_pct:+.1f}%{pnl_note}\n"
+                f"- 账户可用：{acc_funds:.0f} 元"
+            )
+        return "\n".join(parts)
 
     def _parse_suggestion(self, content: str) -> dict:
         """
@@ -353,62 +487,40 @@ class IntradayMonitorAgent(BaseAgent):
             result["action_label"] = "持有"
             return result
 
-        # 提取建议类型（从全文搜索）
-        for label, action in SUGGESTION_TYPES.items():
-            if label in content:
-                result["action"] = action
-                result["action_label"] = label
-                break
+        # 提取建议类型（从全文搜索，取最先出现的关键词）
+        match = _SUGGESTION_RE.search(content)
+        if match:
+            result["action_label"] = match.group(0)
+            result["action"] = SUGGESTION_TYPES[match.group(0)]
 
         # 提取信号（支持多种格式）
-        signal_patterns = [
-            r"「信号」\s*[:：]?\s*(.+?)(?=「|$|\n\n)",
-            r"\*\*信号\*\*\s*[:：]?\s*(.+?)(?=\*\*|$|\n\n)",
-            r"信号\s*[:：]\s*(.+?)(?=\n|$)",
-        ]
-        for pattern in signal_patterns:
-            match = re.search(pattern, content, re.DOTALL)
-            if match:
-                result["signal"] = match.group(1).strip()[:50]
-                break
+        match = _search_field("信号", _SIGNAL_PATTERNS, content)
+        if match:
+            result["signal"] = match.group(1).strip()[:50]
 
         # 提取建议内容（支持多种格式）
-        suggest_patterns = [
-            r"「建议」\s*[:：]?\s*(.+?)(?=「|$|\n\n)",
-            r"\*\*建议\*\*\s*[:：]?\s*(.+?)(?=\*\*|$|\n\n)",
-            r"建议\s*[:：]\s*(.+?)(?=\n|$)",
-        ]
-        for pattern in suggest_patterns:
-            match = re.search(pattern, content, re.DOTALL)
-            if match:
-                suggest_text = match.group(1).strip()
-                # 从建议中提取操作类型
-                for label, action in SUGGESTION_TYPES.items():
-                    if label in suggest_text:
-                        result["action"] = action
-                        result["action_label"] = label
-                        break
-                # 如果信号为空，使用建议内容作为信号
-                if not result["signal"]:
-                    result["signal"] = suggest_text[:50]
-                break
+        match = _search_field("建议", _SUGGEST_PATTERNS, content)
+        if match:
+            suggest_text = match.group(1).strip()
+            # 从建议中提取操作类型
+            label_match = _SUGGESTION_RE.search(suggest_text)
+            if label_match:
+                result["action_label"] = label_match.group(0)
+                result["action"] = SUGGESTION_TYPES[label_match.group(0)]
+            # 如果信号为空，使用建议内容作为信号
+            if not result["signal"]:
+                result["signal"] = suggest_text[:50]
 
         # 提取理由（支持多种格式）
-        reason_patterns = [
-            r"「理由」\s*[:：]?\s*(.+?)(?=「|$|\n\n)",
-            r"\*\*理由\*\*\s*[:：]?\s*(.+?)(?=\*\*|$|\n\n)",
-            r"理由\s*[:：]\s*(.+?)(?=\n|$)",
-        ]
-        for pattern in reason_patterns:
-            match = re.search(pattern, content, re.DOTALL)
-            if match:
-                result["reason"] = match.group(1).strip()[:100]
-                break
+        match = _search_field("理由", _REASON_PATTERNS, content)
+        if match:
+            result["reason"] = match.group(1).strip()[:100]
 
         # 如果没有提取到信号和理由，尝试使用整段内容的前部分
         if not result["signal"] and not result["reason"]:
-            # 清理 markdown 格式后取前 100 字符
-            clean_content = re.sub(r'\*\*|##|#', '', content).strip()
+            # 清理 markdown 格式后取前 100 字符（不含 markdown 标记时无需替换）
+            clean_content = _MD_STRIP.sub('', content) if "#" in content or "**" in content else content
+            clean_content = clean_content.strip()
             # 跳过无需提醒的情况
             if not clean_content.startswith("[无需提醒]"):
                 result["reason"] = clean_content[:100]
@@ -440,10 +552,14 @@ class IntradayMonitorAgent(BaseAgent):
 
         system_prompt, user_content = self.build_prompt(data, context)
 
+        # 先发起 AI 请求：让出一次事件循环使请求立即开始建立连接，再输出日志
+        chat_task = asyncio.create_task(context.ai_client.chat(system_prompt, user_content))
+        await asyncio.sleep(0)
+
         # 打印完整 prompt 用于调试
         logger.info(f"=== Prompt for {stock.symbol} ===\n{user_content}")
 
-        content = await context.ai_client.chat(system_prompt, user_content)
+        content = await chat_task
 
         # 打印 AI 返回结果
         logger.info(f"=== AI Response for {stock.symbol} ===\n{content}")
@@ -451,8 +567,9 @@ class IntradayMonitorAgent(BaseAgent):
         # 解析操作建议
         suggestion = self._parse_suggestion(content)
 
-        # 保存到建议池（包含 prompt 上下文）
-        save_suggestion(
+        # 保存到建议池（包含 prompt 上下文，同步写库放到线程中执行）
+        await asyncio.to_thread(
+            save_suggestion,
             stock_symbol=stock.symbol,
             stock_name=stock.name,
             action=suggestion["action"],
@@ -512,42 +629,29 @@ class IntradayMonitorAgent(BaseAgent):
 
         # 检查节流（测试模式可跳过）
         if not self.bypass_throttle:
-            if not self._check_throttle(symbol):
+            # 同步数据库操作放到线程中执行，避免阻塞事件循环
+            if not await asyncio.to_thread(self._check_and_update_throttle, symbol):
                 logger.info(f"通知节流: {symbol} 在 {self.throttle_minutes} 分钟内已通知")
                 return False
-            # 更新节流记录
-            self._update_throttle(symbol)
         else:
             logger.info(f"跳过节流检查（测试模式）: {symbol}")
 
         return True
 
-    def _check_throttle(self, symbol: str) -> bool:
-        """检查是否可以发送通知（未被节流）"""
-        from src.web.database import SessionLocal
-        from src.web.models import NotifyThrottle
-
-        db = SessionLocal()
-        try:
-            record = db.query(NotifyThrottle).filter(
-                NotifyThrottle.agent_name == self.name,
-                NotifyThrottle.stock_symbol == symbol,
-            ).first()
-
-            if not record:
-                return True
-
-            # 检查是否超过节流时间
-            threshold = datetime.now() - timedelta(minutes=self.throttle_minutes)
-            return record.last_notify_at < threshold
-        finally:
-            db.close()
+    def _check_and_update_throttle(self, symbol: str, now: datetime | None = None) -> bool:
+        """检查是否可以发送通知（未被节流），可以则同时更新节流记录
 
-    def _update_throttle(self, symbol: str):
-        """更新节流记录"""
+        查询和更新在同一个 session 中完成，节流判断与记录时间使用同一个 now。
+        """
         from src.web.database import SessionLocal
         from src.web.models import NotifyThrottle
 
+        now = now or datetime.now()
+        threshold = now - timedelta(minutes=self.throttle_minutes)
+        cached = self._throttle_cache.get(symbol)
+        if cached and cached >= threshold:
+            return False
+
         db = SessionLocal()
         try:
             record = db.query(NotifyThrottle).filter(
@@ -555,8 +659,11 @@ class IntradayMonitorAgent(BaseAgent):
                 NotifyThrottle.stock_symbol == symbol,
             ).first()
 
-            now = datetime.now()
             if record:
+                # 检查是否超过节流时间
+                if record.last_notify_at >= threshold:
+                    self._throttle_cache[symbol] = record.last_notify_at
+                    return False
                 # 检查是否是新的一天
                 if record.last_notify_at.date() < now.date():
                     record.notify_count = 1
@@ -572,6 +679,8 @@ class IntradayMonitorAgent(BaseAgent):
                 ))
 
             db.commit()
+            self._throttle_cache[symbol] = now
+            return True
         finally:
             db.close()
 
@@ -581,37 +690,31 @@ class IntradayMonitorAgent(BaseAgent):
 
         用于实时监控场景，每只股票独立分析和通知
         """
-        # 过滤只保留指定股票
-        original_watchlist = context.config.watchlist
-        context.config.watchlist = [s for s in original_watchlist if s.symbol == stock_symbol]
+        # 只采集指定股票（由 collect 内部过滤，不改写共享的 watchlist）
+        if not any(s.symbol == stock_symbol for s in context.watchlist):
+            return None
 
-        if not context.config.watchlist:
+        data = await self.collect(context, stock_symbol)
+        if not data.get("stock_data"):
             return None
 
-        try:
-            data = await self.collect(context)
-            if not data.get("stock_data"):
-                return None
-
-            result = await self.analyze(context, data)
-
-            if await self.should_notify(result):
-                notify_result = await context.notifier.notify_with_result(
-                    result.title,
-                    result.content,
-                    result.images,
-                )
-                notified = bool(notify_result.get("success"))
-                result.raw_data["notified"] = notified
-                if notified:
-                    logger.info(f"Agent [{self.display_name}] 通知已发送: {stock_symbol}")
-                else:
-                    notify_error = notify_result.get("error") or "未知错误"
-                    result.raw_data["notify_error"] = notify_error
-                    logger.error(f"Agent [{self.display_name}] 通知发送失败: {stock_symbol} - {notify_error}")
+        result = await self.analyze(context, data)
+
+        if await self.should_notify(result):
+            notify_result = await context.notifier.notify_with_result(
+                result.title,
+                result.content,
+                result.images,
+            )
+            notified = bool(notify_result.get("success"))
+            result.raw_data["notified"] = notified
+            if notified:
+                logger.info(f"Agent [{self.display_name}] 通知已发送: {stock_symbol}")
             else:
-                result.raw_data["notified"] = False
+                notify_error = notify_result.get("error") or "未知错误"
+                result.raw_data["notify_error"] = notify_error
+                logger.error(f"Agent [{self.display_name}] 通知发送失败: {stock_symbol} - {notify_error}")
+        else:
+            result.raw_data["notified"] = False
 
-            return result
-        finally:
-            context.config.watchlist = original_watchlist
+        return result
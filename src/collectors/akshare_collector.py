@@ -1,4 +1,5 @@
 """数据采集器 - 基于腾讯股票 HTTP API（稳定可靠，无 SSL 问题）"""
+import asyncio
 import logging
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -111,8 +112,20 @@ def _fetch_tencent_quotes(symbols: list[str]) -> list[dict]:
     url = TENCENT_QUOTE_URL + ",".join(symbols)
     with httpx.Client() as client:
         resp = client.get(url, timeout=10)
-        content = resp.content.decode("gbk", errors="ignore")
+    return _parse_tencent_content(resp.content)
 
+
+async def _fetch_tencent_quotes_async(symbols: list[str], client: httpx.AsyncClient) -> list[dict]:
+    """批量获取腾讯实时行情（异步版本，由调用方提供共享的 AsyncClient）"""
+    if not symbols:
+        return []
+    resp = await client.get(TENCENT_QUOTE_URL + ",".join(symbols), timeout=10)
+    return _parse_tencent_content(resp.content)
+
+
+def _parse_tencent_content(raw: bytes) -> list[dict]:
+    """解析腾讯行情批量响应（GBK 编码），过滤无效/停牌数据"""
+    content = raw.decode("gbk", errors="ignore")
     results = []
     for line in content.strip().split(";"):
         parsed = _parse_tencent_line(line)
@@ -147,12 +160,13 @@ class AkshareCollector(BaseCollector):
         return []
 
     async def get_stock_data(self, symbols: list[str]) -> list[StockData]:
+        # 行情请求为同步 HTTP 调用，放到线程中执行，多个市场可真正并发
         if self.market == MarketCode.CN:
-            return self._get_cn_stocks(symbols)
+            return await asyncio.to_thread(self._get_cn_stocks, symbols)
         elif self.market == MarketCode.HK:
-            return self._get_hk_stocks(symbols)
+            return await asyncio.to_thread(self._get_hk_stocks, symbols)
         elif self.market == MarketCode.US:
-            return self._get_us_stocks(symbols)
+            return await asyncio.to_thread(self._get_us_stocks, symbols)
         return []
 
     def _get_cn_index(self) -> list[IndexData]:
@@ -258,3 +272,129 @@ class AkshareCollector(BaseCollector):
             )
             for item in items
         ]
+
+
+# 按市场复用采集器实例
+_COLLECTORS: dict[MarketCode, AkshareCollector] = {}
+
+
+def get_collector(market: MarketCode) -> AkshareCollector:
+    """获取该市场共享的 AkshareCollector 实例"""
+    collector = _COLLECTORS.get(market)
+    if collector is None:
+        collector = _COLLECTORS.setdefault(market, AkshareCollector(market))
+    return collector
+
+
+# 行情请求合并（singleflight）：同一市场同时只有一个批量查询在进行，
+# 进行中的查询已覆盖所需代码时直接共享结果；否则并入下一批，在当前查询结束后立即发起。
+# 没有并发请求时不引入任何等待。
+# market -> (本批代码的归一化集合, 本批结果 future)
+_inflight_quotes: dict[MarketCode, tuple[frozenset[str], asyncio.Future]] = {}
+# market -> (下一批待查询的代码集合, 下一批结果 future)
+_pending_quotes: dict[MarketCode, tuple[set[str], asyncio.Future]] = {}
+_fetch_tasks: set[asyncio.Task] = set()
+
+
+def _quote_key(symbol: str) -> str:
+    """与 _parse_tencent_line 一致地归一化代码（AAPL.OQ -> AAPL），用于把批量结果拆回各调用方"""
+    if "." in symbol and not symbol.startswith("."):
+        symbol = symbol.split(".")[0]
+    return symbol.upper()
+
+
+async def fetch_quotes(market: MarketCode, symbols: list[str]) -> list[StockData]:
+    """获取实时行情，同一市场的并发请求合并为尽量少的 HTTP 批量查询
+
+    逐只并发分析时每只股票都会单独请求行情，合并后每个市场每轮只需一到两次请求；
+    顺序调用时与直接查询无异。
+    """
+    if not symbols:
+        return []
+    wanted = {_quote_key(s) for s in symbols}
+
+    inflight = _inflight_quotes.get(market)
+    if inflight is None:
+        future = _new_quote_future()
+        batch_symbols = set(symbols)
+        _start_quote_fetch(market, batch_symbols, future)
+    elif wanted <= inflight[0]:
+        future = inflight[1]
+        batch_symbols = inflight[0]
+    else:
+        batch = _pending_quotes.get(market)
+        if batch is None:
+            batch = (set(), _new_quote_future())
+            _pending_quotes[market] = batch
+        batch[0].update(symbols)
+        future = batch[1]
+        batch_symbols = batch[0]
+
+    try:
+        # shield：单个调用方被取消时不影响同批其他调用方
+        stocks = await asyncio.shield(future)
+    except Exception as e:
+        # 合并批次因其他调用方的代码或超时失败时，不连累本调用方：单独重试自己的代码
+        if {_quote_key(s) for s in batch_symbols} == wanted:
+            raise
+        logger.warning(f"合并行情查询失败（{market.value}），单独重试 {len(symbols)} 只: {e}")
+        return await get_collector(market).get_stock_data(list(symbols))
+
+    mine = [stock for stock in stocks if _quote_key(stock.symbol) in wanted]
+    if not mine and {_quote_key(s) for s in batch_symbols} != wanted:
+        # 采集器出错时记录日志并返回空列表，合并批次整体为空同样单独重试一次
+        return await get_collector(market).get_stock_data(list(symbols))
+    return mine
+
+
+def _new_quote_future() -> asyncio.Future:
+    future = asyncio.get_running_loop().create_future()
+    # 所有调用方都已取消时，避免 "Future exception was never retrieved" 警告
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    return future
+
+
+def _start_quote_fetch(market: MarketCode, symbols: set[str], future: asyncio.Future):
+    _inflight_quotes[market] = (frozenset(_quote_key(s) for s in symbols), future)
+    task = asyncio.create_task(_run_quote_fetch(market, symbols, future))
+    _fetch_tasks.add(task)
+    task.add_done_callback(lambda t: _on_quote_fetch_done(market, future, t))
+
+
+def _on_quote_fetch_done(market: MarketCode, future: asyncio.Future, task: asyncio.Task):
+    _fetch_tasks.discard(task)
+    if future.done():
+        return
+    # 任务在开始执行前即被取消时 _run_quote_fetch 的 finally 不会运行，在这里兜底结束等待方
+    future.cancel()
+    if _inflight_quotes.get(market, (None, None))[1] is future:
+        del _inflight_quotes[market]
+    batch = _pending_quotes.pop(market, None)
+    if batch is not None:
+        batch[1].cancel()
+
+
+async def _run_quote_fetch(market: MarketCode, symbols: set[str], future: asyncio.Future):
+    """执行本批查询并把结果（或异常）交给所有等待方，结束后发起下一批"""
+    cancelled = False
+    try:
+        stocks = await get_collector(market).get_stock_data(sorted(symbols))
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    except Exception as e:
+        future.set_exception(e)
+    else:
+        future.set_result(stocks)
+    finally:
+        # 无论如何都要结束 future，否则等待方会永远挂起
+        if not future.done():
+            future.cancel()
+        if _inflight_quotes.get(market, (None, None))[1] is future:
+            del _inflight_quotes[market]
+        batch = _pending_quotes.pop(market, None)
+        if batch is not None:
+            if cancelled:
+                batch[1].cancel()
+            else:
+                _start_quote_fetch(market, *batch)
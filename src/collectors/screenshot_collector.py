@@ -1,4 +1,5 @@
 """K线图截图采集器 - 基于 Playwright"""
+import asyncio
 import logging
 import os
 import tempfile
@@ -19,6 +20,15 @@ DEFAULT_CONFIG = {
     "extra_wait_ms": 3000,  # 等待图表渲染
 }
 
+# Playwright 浏览器安装任务（服务启动时在后台线程执行，启动浏览器前需等待其完成）
+_browser_setup: asyncio.Future | None = None
+
+
+def set_browser_setup_task(task: asyncio.Future):
+    """登记浏览器安装任务"""
+    global _browser_setup
+    _browser_setup = task
+
 
 @dataclass
 class ChartScreenshot:
@@ -55,6 +65,10 @@ class ScreenshotCollector:
         if self._browser is not None:
             return
 
+        if _browser_setup is not None and not _browser_setup.done():
+            logger.info("等待 Playwright 浏览器安装完成...")
+            await asyncio.shield(_browser_setup)
+
         try:
             from playwright.async_api import async_playwright
             self._playwright = await async_playwright().start()
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pathlib import Path
 from dataclasses import dataclass, field
 
@@ -32,6 +33,12 @@ class Settings(BaseSettings):
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """进程内单例，避免每次调用都重新解析环境变量和 .env 文件"""
+    return Settings()
+
+
 @dataclass
 class StockConfig:
     """自选股配置"""
@@ -71,6 +78,6 @@ def load_watchlist(path: str | Path = "config/watchlist.yaml") -> list[StockConf
 
 def load_config() -> AppConfig:
     """加载完整配置"""
-    settings = Settings()
+    settings = get_settings()
     watchlist = load_watchlist()
     return AppConfig(settings=settings, watchlist=watchlist)
@@ -0,0 +1,66 @@
+"""Agent 元数据缓存 - 各 Agent 的 execution_mode / config
+
+通过 config_cache 缓存（TTL + 版本号失效）：启动时在 seed_agents 之后预加载，
+本进程内 Web 端修改或删除 AgentConfig 后调用 reload_agent_meta() 立即刷新；
+其他 worker 或直接修改数据库的变更最迟在 TTL 到期后生效。
+"""
+import logging
+
+from sqlalchemy.orm import Session
+
+from src.core import config_cache
+from src.web.database import session_scope
+from src.web.models import AgentConfig
+
+logger = logging.getLogger(__name__)
+
+_CACHE_KEY = ("agent_meta",)
+
+# 单只模式下同时分析的股票数上限（可通过 Agent 配置 concurrency 覆盖）
+SINGLE_MODE_CONCURRENCY = 5
+
+_DEFAULT_META = {"execution_mode": "batch", "config": {}}
+
+
+def _load_agent_meta(db: Session | None = None) -> dict[str, dict]:
+    """从数据库加载全部 Agent 元数据：agent_name -> {"execution_mode": str, "config": dict}"""
+    with session_scope(db) as db:
+        rows = db.query(AgentConfig.name, AgentConfig.execution_mode, AgentConfig.config).all()
+    return {
+        name: {"execution_mode": execution_mode or "batch", "config": config or {}}
+        for name, execution_mode, config in rows
+    }
+
+
+def reload_agent_meta(db: Session | None = None) -> None:
+    """使全部配置缓存失效（AI 模型、通知渠道等解析也依赖 AgentConfig），并立即重新加载元数据"""
+    config_cache.invalidate()
+    config_cache.cached(_CACHE_KEY, lambda: _load_agent_meta(db))
+
+
+def get_agent_meta(agent_name: str) -> dict:
+    """获取 Agent 元数据，未知 Agent 返回默认值（返回值应视为只读）
+
+    缓存过期时会查询数据库，在事件循环中应放到线程里调用。
+    """
+    return config_cache.cached(_CACHE_KEY, _load_agent_meta).get(agent_name, _DEFAULT_META)
+
+
+def _parse_concurrency(agent_name: str, value) -> int:
+    """解析 Agent 配置中的并发数，非法值回退默认值，且至少为 1（0 会导致信号量永远无法获取）"""
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        logger.warning(f"Agent {agent_name} 配置的 concurrency 无效: {value!r}，使用默认值 {SINGLE_MODE_CONCURRENCY}")
+        return SINGLE_MODE_CONCURRENCY
+
+
+def split_agent_config(agent_name: str, config: dict | None) -> tuple[dict, int]:
+    """拆分 AgentConfig.config：返回 (Agent 构造参数, 单只模式并发数)
+
+    concurrency 是调度参数而非 Agent 字段，所有构造 Agent 的地方都应先经过这里，
+    否则 agent_cls(**config) 会因未知参数抛出 TypeError。
+    """
+    agent_kwargs = dict(config or {})
+    concurrency = _parse_concurrency(agent_name, agent_kwargs.pop("concurrency", SINGLE_MODE_CONCURRENCY))
+    return agent_kwargs, concurrency
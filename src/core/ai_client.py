@@ -1,16 +1,20 @@
+import asyncio
 import base64
 import logging
+import threading
 from pathlib import Path
 
 from openai import AsyncOpenAI
 
+from src.core import config_cache
+
 logger = logging.getLogger(__name__)
 
 
-class AIClient:
-    """OpenAI 协议兼容的 AI 客户端"""
+class _SharedClient:
+    """按连接参数共享的 AsyncOpenAI（含 HTTP 连接池），记录进行中的调用数以便安全关闭"""
 
-    def __init__(self, base_url: str, api_key: str, model: str, proxy: str = ""):
+    def __init__(self, base_url: str, api_key: str, proxy: str):
         kwargs = {
             "base_url": base_url,
             "api_key": api_key,
@@ -18,6 +22,68 @@ class AIClient:
         if proxy:
             kwargs["http_client"] = None  # TODO: 如需代理，用 httpx 配置
         self.client = AsyncOpenAI(**kwargs)
+        # 连接池绑定创建时的事件循环，关闭也需在该循环中进行
+        self.loop = asyncio.get_running_loop()
+        self.active = 0
+        self.retired = False
+
+
+# (base_url, api_key, proxy) -> 共享客户端
+_shared_clients: dict[tuple[str, str, str], _SharedClient] = {}
+_shared_lock = threading.Lock()
+
+
+def _acquire_shared(base_url: str, api_key: str, proxy: str) -> _SharedClient:
+    key = (base_url, api_key, proxy)
+    with _shared_lock:
+        shared = _shared_clients.get(key)
+        if shared is None:
+            shared = _shared_clients[key] = _SharedClient(base_url, api_key, proxy)
+        shared.active += 1
+    return shared
+
+
+async def _release_shared(shared: _SharedClient):
+    with _shared_lock:
+        shared.active -= 1
+        idle_retired = shared.retired and shared.active == 0
+    if idle_retired:
+        await shared.client.close()
+
+
+def close_shared_clients():
+    """停止复用现有连接池：空闲的立即关闭，使用中的在最后一个调用结束后关闭
+
+    配置变更（config_cache.invalidate）时自动调用，服务商的 base_url / api_key
+    修改后旧连接池不会残留。可在任意线程调用。
+    """
+    with _shared_lock:
+        retired = list(_shared_clients.values())
+        _shared_clients.clear()
+        idle = []
+        for shared in retired:
+            shared.retired = True
+            if shared.active == 0:
+                idle.append(shared)
+    for shared in idle:
+        if not shared.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(shared.client.close(), shared.loop)
+
+
+config_cache.add_invalidate_listener(close_shared_clients)
+
+
+class AIClient:
+    """OpenAI 协议兼容的 AI 客户端
+
+    实例很轻量，每次构建上下文时新建（token 计数只统计本次运行）；
+    底层 HTTP 连接池按 (base_url, api_key, proxy) 在实例之间共享。
+    """
+
+    def __init__(self, base_url: str, api_key: str, model: str, proxy: str = ""):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.proxy = proxy
         self.model = model
         self.total_tokens_used = 0
 
@@ -55,8 +121,9 @@ class AIClient:
         else:
             messages.append({"role": "user", "content": user_content})
 
+        shared = _acquire_shared(self.base_url, self.api_key, self.proxy)
         try:
-            response = await self.client.chat.completions.create(
+            response = await shared.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
@@ -74,6 +141,8 @@ class AIClient:
         except Exception as e:
             logger.error(f"AI 调用失败: {e}")
             raise
+        finally:
+            await _release_shared(shared)
 
     def _encode_image(self, image_path: str) -> str | None:
         """将图片文件编码为 base64"""
@@ -0,0 +1,62 @@
+"""配置读取缓存 - 进程内 TTL 缓存，Web 端修改配置后失效
+
+Agent 每次触发都要读取 AI 模型、通知渠道、代理等配置，这些数据很少变化，
+缓存后可省去大部分重复查询。写配置的 API 需在提交后调用 invalidate()。
+"""
+import functools
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+CONFIG_CACHE_TTL = 30  # 秒
+
+_cache: dict[Hashable, tuple[float, Any]] = {}
+_lock = threading.Lock()
+# 配置版本号：每次失效时递增，防止失效前开始的加载把旧值写回缓存
+_version = 0
+# 失效时额外执行的回调（如关闭按旧配置建立的连接池）
+_invalidate_listeners: list[Callable[[], None]] = []
+
+
+def cached(key: Hashable, loader: Callable[[], Any], ttl: float = CONFIG_CACHE_TTL) -> Any:
+    """读取缓存，未命中或已过期时调用 loader 加载并写入"""
+    with _lock:
+        entry = _cache.get(key)
+        version = _version
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+
+    value = loader()
+    with _lock:
+        if version == _version:
+            _cache[key] = (time.monotonic() + ttl, value)
+    return value
+
+
+def config_cached(func: Callable) -> Callable:
+    """装饰器：按函数名 + 参数缓存返回值（返回值应视为只读）
+
+    关键字参数 db（调用方传入的 Session）不参与缓存键。
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__qualname__, args, tuple(sorted((k, v) for k, v in kwargs.items() if k != "db")))
+        return cached(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def add_invalidate_listener(callback: Callable[[], None]):
+    """注册配置失效回调，invalidate() 时在调用方线程中执行"""
+    _invalidate_listeners.append(callback)
+
+
+def invalidate():
+    """配置变更后调用，使所有缓存失效"""
+    global _version
+    with _lock:
+        _version += 1
+        _cache.clear()
+    for callback in _invalidate_listeners:
+        callback()
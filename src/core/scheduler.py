@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import time
+from dataclasses import replace
 from typing import Callable, Awaitable
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -7,6 +9,7 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
 from src.agents.base import BaseAgent, AgentContext
+from src.core.agent_meta import SINGLE_MODE_CONCURRENCY
 from src.core.agent_runs import record_agent_run
 from src.models.market import MARKETS
 
@@ -20,6 +23,7 @@ class AgentScheduler:
         self.scheduler = AsyncIOScheduler()
         self.agents: dict[str, BaseAgent] = {}
         self.execution_modes: dict[str, str] = {}
+        self.concurrency: dict[str, int] = {}
         # 改为存储 context 构建函数，而非固定 context
         self.context_builder: Callable[[str], AgentContext] | None = None
 
@@ -27,7 +31,13 @@ class AgentScheduler:
         """设置 context 构建函数（每次执行时动态构建）"""
         self.context_builder = builder
 
-    def register(self, agent: BaseAgent, schedule: str, execution_mode: str = "batch"):
+    def register(
+        self,
+        agent: BaseAgent,
+        schedule: str,
+        execution_mode: str = "batch",
+        concurrency: int = SINGLE_MODE_CONCURRENCY,
+    ):
         """
         注册 Agent 到调度器。
 
@@ -37,9 +47,11 @@ class AgentScheduler:
                 - cron 格式: "分 时 日 月 周" (5 部分)
                 - interval 格式: "interval:3m" 或 "interval:30s"
             execution_mode: 执行模式 batch/single（single 将逐只股票执行 run_single）
+            concurrency: single 模式下同时分析的股票数上限
         """
         self.agents[agent.name] = agent
         self.execution_modes[agent.name] = execution_mode or "batch"
+        self.concurrency[agent.name] = max(1, concurrency)
 
         # 解析调度表达式
         if schedule.startswith("interval:"):
@@ -105,14 +117,15 @@ class AgentScheduler:
 
         start = time.monotonic()
         try:
-            # 每次执行时动态构建 context（获取最新配置）
-            context = self.context_builder(agent_name)
+            # 每次执行时动态构建 context（获取最新配置），数据库查询放到线程中执行
+            context = await asyncio.to_thread(self.context_builder, agent_name)
             logger.info(f"[调度] 开始执行 Agent: {agent.display_name}")
             mode = self.execution_modes.get(agent_name, "batch")
             if mode == "single" and hasattr(agent, "run_single"):
                 processed = 0
                 skipped = 0
                 errors: list[str] = []
+                targets = []
                 for stock in list(context.watchlist):
                     market_def = MARKETS.get(stock.market)
                     if market_def and not market_def.is_trading_time():
@@ -121,15 +134,27 @@ class AgentScheduler:
                             f"[调度] 跳过 {agent.display_name} {stock.symbol}（{market_def.name} 非交易时段）"
                         )
                         continue
-                    try:
-                        await agent.run_single(context, stock.symbol)  # type: ignore[attr-defined]
-                        processed += 1
-                    except Exception as e:
-                        logger.error(
-                            f"Agent [{agent_name}] 单只执行失败 {stock.symbol}: {e}",
-                            exc_info=True,
-                        )
-                        errors.append(f"{stock.symbol}: {e}")
+                    targets.append(stock)
+
+                # 与手动触发一致：信号量限制同时进行的分析数，单只失败不影响其他股票
+                sem = asyncio.Semaphore(self.concurrency.get(agent_name, SINGLE_MODE_CONCURRENCY))
+
+                async def run_one(stock):
+                    nonlocal processed
+                    async with sem:
+                        # run_single 可能临时改写 watchlist，每个任务使用独立的 context 副本
+                        stock_context = replace(context, config=replace(context.config))
+                        try:
+                            await agent.run_single(stock_context, stock.symbol)  # type: ignore[attr-defined]
+                            processed += 1
+                        except Exception as e:
+                            logger.error(
+                                f"Agent [{agent_name}] 单只执行失败 {stock.symbol}: {e}",
+                                exc_info=True,
+                            )
+                            errors.append(f"{stock.symbol}: {e}")
+
+                await asyncio.gather(*(run_one(stock) for stock in targets))
                 logger.info(
                     f"[调度] Agent 单只模式执行完成: {agent.display_name}（执行{processed}，跳过{skipped}，共{len(context.watchlist)}）"
                 )
@@ -1,91 +1,118 @@
 """账户和持仓管理 API"""
+import asyncio
 import logging
 import time
 import httpx
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session, joinedload, selectinload
 from pydantic import BaseModel
 
 from src.web.database import get_db
 from src.web.models import Account, Position, Stock
-from src.collectors.akshare_collector import _tencent_symbol, _fetch_tencent_quotes
-from src.models.market import MarketCode
+from src.collectors.akshare_collector import _tencent_symbol, _fetch_tencent_quotes_async
+from src.models.market import MarketCode, MARKETS
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# 汇率缓存
-_hkd_rate_cache: dict = {"rate": 0.92, "ts": 0}  # 港币默认汇率 0.92
-_usd_rate_cache: dict = {"rate": 7.25, "ts": 0}  # 美元默认汇率 7.25
+# 汇率缓存：币种 -> {汇率, 更新时间, 最近一次尝试刷新的时间}
+_fx_cache: dict[str, dict] = {
+    "HKD": {"rate": 0.92, "ts": 0, "attempted": 0.0},  # 港币默认汇率 0.92
+    "USD": {"rate": 7.25, "ts": 0, "attempted": 0.0},  # 美元默认汇率 7.25
+}
+# 币种 -> (新浪行情代码, 日志名称)
+_FX_SOURCES = {
+    "HKD": ("fx_shkdcny", "港币"),
+    "USD": ("fx_susdcny", "美元"),
+}
+_fx_locks = {currency: asyncio.Lock() for currency in _fx_cache}
 EXCHANGE_RATE_TTL = 3600  # 1 小时缓存
 
+# 持仓汇总行情缓存：(market, symbol) -> (行情, 过期时间)，避免频繁刷新页面时反复请求腾讯接口
+_quote_cache: dict[tuple[str, str], tuple[dict, float]] = {}
+QUOTE_TTL_TRADING = 5  # 交易时段 5 秒
+QUOTE_TTL_CLOSED = 300  # 休市 5 分钟
 
-def get_hkd_cny_rate() -> float:
-    """获取港币兑人民币汇率"""
-    global _hkd_rate_cache
+# 支持行情查询的市场代码（股票表中可能存在未知市场的数据）
+_VALID_MARKETS = {m.value for m in MarketCode}
+
+
+def create_fx_client() -> httpx.AsyncClient:
+    """汇率查询共享的 HTTP 客户端（在应用 lifespan 中创建和关闭，复用 keep-alive 连接）"""
+    return httpx.AsyncClient(
+        timeout=5,
+        headers={
+            "User-Agent": "Mozilla/5.0",
+            "Referer": "https://finance.sina.com.cn/"
+        },
+        limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
+    )
 
-    # 检查缓存
-    if time.time() - _hkd_rate_cache["ts"] < EXCHANGE_RATE_TTL:
-        return _hkd_rate_cache["rate"]
-
-    # 从新浪财经获取汇率
-    try:
-        resp = httpx.get(
-            "https://hq.sinajs.cn/list=fx_shkdcny",
-            timeout=5,
-            headers={
-                "User-Agent": "Mozilla/5.0",
-                "Referer": "https://finance.sina.com.cn/"
-            }
-        )
-        # 格式: var hq_str_fx_shkdcny="时间,汇率,..."
-        text = resp.text
-        if "=" in text and "," in text:
-            data = text.split('"')[1]
-            parts = data.split(",")
-            if len(parts) > 1:
-                rate = float(parts[1])
-                _hkd_rate_cache = {"rate": rate, "ts": time.time()}
-                logger.info(f"更新港币汇率: {rate}")
-                return rate
-    except Exception as e:
-        logger.warning(f"获取港币汇率失败，使用缓存: {e}")
-
-    return _hkd_rate_cache["rate"]
-
-
-def get_usd_cny_rate() -> float:
-    """获取美元兑人民币汇率"""
-    global _usd_rate_cache
+
+def get_fx_client(request: Request) -> httpx.AsyncClient:
+    """依赖注入：获取 lifespan 中创建的汇率 HTTP 客户端"""
+    return request.app.state.fx_client
+
+
+def create_quote_client() -> httpx.AsyncClient:
+    """持仓行情查询共享的 HTTP 客户端（在应用 lifespan 中创建和关闭，复用 keep-alive 连接）"""
+    return httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
+    )
+
+
+def get_quote_client(request: Request) -> httpx.AsyncClient:
+    """依赖注入：获取 lifespan 中创建的行情 HTTP 客户端"""
+    return request.app.state.quote_client
+
+
+async def _get_fx_rate(client: httpx.AsyncClient, currency: str) -> float:
+    """获取外币兑人民币汇率（带缓存，同一币种并发刷新只请求一次）"""
+    entry = _fx_cache[currency]
 
     # 检查缓存
-    if time.time() - _usd_rate_cache["ts"] < EXCHANGE_RATE_TTL:
-        return _usd_rate_cache["rate"]
-
-    # 从新浪财经获取汇率
-    try:
-        resp = httpx.get(
-            "https://hq.sinajs.cn/list=fx_susdcny",
-            timeout=5,
-            headers={
-                "User-Agent": "Mozilla/5.0",
-                "Referer": "https://finance.sina.com.cn/"
-            }
-        )
-        # 格式: var hq_str_fx_susdcny="时间,汇率,..."
-        text = resp.text
-        if "=" in text and "," in text:
-            data = text.split('"')[1]
-            parts = data.split(",")
-            if len(parts) > 1:
-                rate = float(parts[1])
-                _usd_rate_cache = {"rate": rate, "ts": time.time()}
-                logger.info(f"更新美元汇率: {rate}")
-                return rate
-    except Exception as e:
-        logger.warning(f"获取美元汇率失败，使用缓存: {e}")
-
-    return _usd_rate_cache["rate"]
+    if time.time() - entry["ts"] < EXCHANGE_RATE_TTL:
+        return entry["rate"]
+
+    waiting_since = time.monotonic()
+    async with _fx_locks[currency]:
+        # 等锁期间其他请求已刷新（或刚尝试失败）时直接使用缓存，避免重复请求
+        if time.time() - entry["ts"] < EXCHANGE_RATE_TTL or entry["attempted"] >= waiting_since:
+            return entry["rate"]
+        code, label = _FX_SOURCES[currency]
+
+        # 从新浪财经获取汇率
+        try:
+            resp = await client.get(f"https://hq.sinajs.cn/list={code}")
+            # 格式: var hq_str_fx_shkdcny="时间,汇率,..."
+            text = resp.text
+            if "=" in text and "," in text:
+                data = text.split('"')[1]
+                parts = data.split(",")
+                if len(parts) > 1:
+                    rate = float(parts[1])
+                    entry.update(rate=rate, ts=time.time())
+                    logger.info("更新%s汇率: %s", label, rate)
+        except Exception as e:
+            logger.warning("获取%s汇率失败，使用缓存: %s", label, e)
+        finally:
+            entry["attempted"] = time.monotonic()
+
+    return entry["rate"]
+
+
+async def get_hkd_cny_rate(client: httpx.AsyncClient) -> float:
+    """获取港币兑人民币汇率"""
+    return await _get_fx_rate(client, "HKD")
+
+
+async def get_usd_cny_rate(client: httpx.AsyncClient) -> float:
+    """获取美元兑人民币汇率"""
+    return await _get_fx_rate(client, "USD")
 
 
 # ========== Pydantic Models ==========
@@ -166,10 +193,12 @@ def create_account(data: AccountCreate, db: Session = Depends(get_db)):
     """创建账户"""
     account = Account(name=data.name, available_funds=data.available_funds)
     db.add(account)
+    # flush 后即可拿到自增 id；提交前生成响应，避免提交后属性过期触发重新查询
+    db.flush()
+    result = AccountResponse.model_validate(account)
     db.commit()
-    db.refresh(account)
-    logger.info(f"创建账户: {account.name}")
-    return account
+    logger.info("创建账户: %s", result.name)
+    return result
 
 
 @router.put("/accounts/{account_id}", response_model=AccountResponse)
@@ -186,10 +215,11 @@ def update_account(account_id: int, data: AccountUpdate, db: Session = Depends(g
     if data.enabled is not None:
         account.enabled = data.enabled
 
+    # 响应字段都已在内存中，提交前生成响应，无需提交后重新查询
+    result = AccountResponse.model_validate(account)
     db.commit()
-    db.refresh(account)
-    logger.info(f"更新账户: {account.name}")
-    return account
+    logger.info("更新账户: %s", result.name)
+    return result
 
 
 @router.delete("/accounts/{account_id}")
@@ -201,7 +231,7 @@ def delete_account(account_id: int, db: Session = Depends(get_db)):
 
     db.delete(account)
     db.commit()
-    logger.info(f"删除账户: {account.name}")
+    logger.info("删除账户: %s", account.name)
     return {"success": True}
 
 
@@ -214,49 +244,38 @@ def list_positions(
     db: Session = Depends(get_db)
 ):
     """获取持仓列表，可按账户或股票筛选"""
-    query = db.query(Position)
+    # 一次性 JOIN 出账户和股票，避免逐行懒加载
+    query = db.query(Position).options(joinedload(Position.account), joinedload(Position.stock))
     if account_id:
         query = query.filter(Position.account_id == account_id)
     if stock_id:
         query = query.filter(Position.stock_id == stock_id)
 
-    positions = query.all()
-    result = []
-    for pos in positions:
-        result.append({
-            "id": pos.id,
-            "account_id": pos.account_id,
-            "stock_id": pos.stock_id,
-            "cost_price": pos.cost_price,
-            "quantity": pos.quantity,
-            "invested_amount": pos.invested_amount,
-            "trading_style": pos.trading_style,
-            "account_name": pos.account.name if pos.account else None,
-            "stock_symbol": pos.stock.symbol if pos.stock else None,
-            "stock_name": pos.stock.name if pos.stock else None,
-        })
-    return result
+    # 关联字段由 Position 的属性提供，直接按 PositionResponse 序列化 ORM 对象
+    return query.all()
 
 
 @router.post("/positions", response_model=PositionResponse)
 def create_position(data: PositionCreate, db: Session = Depends(get_db)):
     """创建持仓"""
-    # 检查账户和股票是否存在
-    account = db.query(Account).filter(Account.id == data.account_id).first()
-    if not account:
+    # 一次查询同时检查账户、股票是否存在，以及该账户是否已持有该股票
+    account_name, stock_symbol, stock_name, existing = db.execute(
+        select(
+            select(Account.name).where(Account.id == data.account_id).scalar_subquery(),
+            select(Stock.symbol).where(Stock.id == data.stock_id).scalar_subquery(),
+            select(Stock.name).where(Stock.id == data.stock_id).scalar_subquery(),
+            exists().where(
+                Position.account_id == data.account_id,
+                Position.stock_id == data.stock_id,
+            ),
+        )
+    ).one()
+    if account_name is None:
         raise HTTPException(400, "账户不存在")
-
-    stock = db.query(Stock).filter(Stock.id == data.stock_id).first()
-    if not stock:
+    if stock_name is None:
         raise HTTPException(400, "股票不存在")
-
-    # 检查是否已存在该账户的该股票持仓
-    existing = db.query(Position).filter(
-        Position.account_id == data.account_id,
-        Position.stock_id == data.stock_id,
-    ).first()
     if existing:
-        raise HTTPException(400, f"账户 {account.name} 已有 {stock.name} 的持仓，请编辑现有持仓")
+        raise HTTPException(400, f"账户 {account_name} 已有 {stock_name} 的持仓，请编辑现有持仓")
 
     position = Position(
         account_id=data.account_id,
@@ -267,11 +286,9 @@ def create_position(data: PositionCreate, db: Session = Depends(get_db)):
         trading_style=data.trading_style,
     )
     db.add(position)
-    db.commit()
-    db.refresh(position)
-
-    logger.info(f"创建持仓: {account.name} - {stock.name}")
-    return {
+    # flush 后即可拿到自增 id；提交前生成响应，避免提交后属性过期触发重新查询
+    db.flush()
+    result = {
         "id": position.id,
         "account_id": position.account_id,
         "stock_id": position.stock_id,
@@ -279,16 +296,25 @@ def create_position(data: PositionCreate, db: Session = Depends(get_db)):
         "quantity": position.quantity,
         "invested_amount": position.invested_amount,
         "trading_style": position.trading_style,
-        "account_name": account.name,
-        "stock_symbol": stock.symbol,
-        "stock_name": stock.name,
+        "account_name": account_name,
+        "stock_symbol": stock_symbol,
+        "stock_name": stock_name,
     }
+    db.commit()
+
+    logger.info("创建持仓: %s - %s", result["account_name"], result["stock_name"])
+    return result
 
 
 @router.put("/positions/{position_id}", response_model=PositionResponse)
 def update_position(position_id: int, data: PositionUpdate, db: Session = Depends(get_db)):
     """更新持仓"""
-    position = db.query(Position).filter(Position.id == position_id).first()
+    position = (
+        db.query(Position)
+        .options(joinedload(Position.account), joinedload(Position.stock))
+        .filter(Position.id == position_id)
+        .first()
+    )
     if not position:
         raise HTTPException(404, "持仓不存在")
 
@@ -302,22 +328,12 @@ def update_position(position_id: int, data: PositionUpdate, db: Session = Depend
         # 空字符串表示清空，设为 None
         position.trading_style = data.trading_style if data.trading_style else None
 
+    # 响应字段都已在内存中，提交前生成响应，无需提交后重新查询
+    result = PositionResponse.model_validate(position)
     db.commit()
-    db.refresh(position)
 
-    logger.info(f"更新持仓: {position.account.name} - {position.stock.name}")
-    return {
-        "id": position.id,
-        "account_id": position.account_id,
-        "stock_id": position.stock_id,
-        "cost_price": position.cost_price,
-        "quantity": position.quantity,
-        "invested_amount": position.invested_amount,
-        "trading_style": position.trading_style,
-        "account_name": position.account.name,
-        "stock_symbol": position.stock.symbol,
-        "stock_name": position.stock.name,
-    }
+    logger.info("更新持仓: %s - %s", result.account_name, result.stock_name)
+    return result
 
 
 @router.delete("/positions/{position_id}")
@@ -329,17 +345,27 @@ def delete_position(position_id: int, db: Session = Depends(get_db)):
 
     db.delete(position)
     db.commit()
-    logger.info(f"删除持仓: {position.account.name} - {position.stock.name}")
+    logger.info("删除持仓: %s - %s", position.account.name, position.stock.name)
     return {"success": True}
 
 
 # ========== Portfolio Summary ==========
 
+def _load_summary_accounts(db: Session, account_id: int | None) -> list[Account]:
+    """获取启用的账户（预加载持仓及对应股票，之后的汇总计算不再访问数据库）"""
+    query = db.query(Account).options(selectinload(Account.positions).selectinload(Position.stock))
+    if account_id:
+        return query.filter(Account.id == account_id, Account.enabled == True).all()
+    return query.filter(Account.enabled == True).all()
+
+
 @router.get("/portfolio/summary")
-def get_portfolio_summary(
+async def get_portfolio_summary(
     account_id: int | None = None,
     include_quotes: bool = True,
     db: Session = Depends(get_db),
+    fx_client: httpx.AsyncClient = Depends(get_fx_client),
+    quote_client: httpx.AsyncClient = Depends(get_quote_client),
 ):
     """
     获取持仓汇总信息
@@ -351,14 +377,11 @@ def get_portfolio_summary(
         accounts: 账户列表及各账户持仓明细
         total: 所有账户汇总
     """
-    # 获取账户
-    if account_id:
-        accounts = db.query(Account).filter(Account.id == account_id, Account.enabled == True).all()
-    else:
-        accounts = db.query(Account).filter(Account.enabled == True).all()
+    # 同步数据库查询放到线程中执行，事件循环上只等待网络请求（行情、汇率）
+    accounts = await asyncio.to_thread(_load_summary_accounts, db, account_id)
 
     if not accounts:
-        return {
+        return _orjson_response({
             "accounts": [],
             "total": {
                 "total_market_value": 0,
@@ -368,23 +391,19 @@ def get_portfolio_summary(
                 "available_funds": 0,
                 "total_assets": 0,
             }
-        }
-
-    # 获取所有相关股票
-    all_stock_ids = set()
-    for acc in accounts:
-        for pos in acc.positions:
-            all_stock_ids.add(pos.stock_id)
-
-    stocks = db.query(Stock).filter(Stock.id.in_(all_stock_ids)).all() if all_stock_ids else []
-    stock_map = {s.id: s for s in stocks}
+        })
 
-    # 获取实时行情（可选）
-    quotes = _fetch_quotes_for_stocks(stocks) if include_quotes else {}
+    # 所有相关股票（已随持仓预加载）；同一股票可能被多个账户持有，按 id 去重后批量查询行情
+    stocks = list({pos.stock_id: pos.stock for acc in accounts for pos in acc.positions if pos.stock}.values())
 
-    # 获取汇率
-    hkd_rate = get_hkd_cny_rate()
-    usd_rate = get_usd_cny_rate()
+    # 汇率（缓存过期时需请求新浪）与实时行情（可选）互不依赖，并发获取
+    hkd_rate, usd_rate, quotes = await asyncio.gather(
+        get_hkd_cny_rate(fx_client),
+        get_usd_cny_rate(fx_client),
+        _fetch_quotes_for_stocks(stocks, quote_client) if include_quotes else asyncio.sleep(0, result={}),
+    )
+    # 外币市场 -> 兑人民币汇率
+    rate_map = {"HK": hkd_rate, "US": usd_rate}
 
     # 计算各账户持仓
     account_summaries = []
@@ -398,7 +417,7 @@ def get_portfolio_summary(
         acc_cost = 0
 
         for pos in acc.positions:
-            stock = stock_map.get(pos.stock_id)
+            stock = pos.stock
             if not stock:
                 continue
 
@@ -406,22 +425,10 @@ def get_portfolio_summary(
             current_price = quote["current_price"] if quote else None
             change_pct = quote["change_pct"] if quote else None
 
-            # 根据市场确定汇率
-            is_foreign = stock.market in ("HK", "US")
-            if stock.market == "HK":
-                rate = hkd_rate
-            elif stock.market == "US":
-                rate = usd_rate
-            else:
-                rate = 1.0
-
-            market_value = None
-            market_value_cny = None
-            pnl = None
-            pnl_pct = None
+            # 根据市场确定汇率（A 股等人民币计价为 1.0）
+            rate = rate_map.get(stock.market, 1.0)
 
-            cost = pos.cost_price * pos.quantity
-            cost_cny = cost * rate  # 假设成本价也是原币种
+            cost_cny = pos.cost_price * pos.quantity * rate  # 假设成本价也是原币种
             acc_cost += cost_cny
 
             if current_price is not None:
@@ -429,8 +436,10 @@ def get_portfolio_summary(
                 market_value_cny = market_value * rate  # 人民币市值
                 pnl = market_value_cny - cost_cny
                 pnl_pct = (pnl / cost_cny * 100) if cost_cny > 0 else 0
-
                 acc_market_value += market_value_cny
+                current_price_cny = current_price * rate
+            else:
+                market_value = market_value_cny = pnl = pnl_pct = current_price_cny = None
 
             positions_data.append({
                 "id": pos.id,
@@ -443,13 +452,13 @@ def get_portfolio_summary(
                 "invested_amount": pos.invested_amount,
                 "trading_style": pos.trading_style,
                 "current_price": current_price,
-                "current_price_cny": round(current_price * rate, 2) if current_price else None,
+                "current_price_cny": _round2(current_price_cny),
                 "change_pct": change_pct,
-                "market_value": round(market_value, 2) if market_value else None,
-                "market_value_cny": round(market_value_cny, 2) if market_value_cny else None,
-                "pnl": round(pnl, 2) if pnl else None,
-                "pnl_pct": round(pnl_pct, 2) if pnl_pct else None,
-                "exchange_rate": rate if is_foreign else None,
+                "market_value": _round2(market_value),
+                "market_value_cny": _round2(market_value_cny),
+                "pnl": _round2(pnl),
+                "pnl_pct": _round2(pnl_pct),
+                "exchange_rate": rate if stock.market in rate_map else None,
             })
 
         if include_quotes:
@@ -495,7 +504,7 @@ def get_portfolio_summary(
                 "change_pct": quote.get("change_pct"),
             }
 
-    return {
+    return _orjson_response({
         "accounts": account_summaries,
         "total": {
             "total_market_value": round(grand_total_market_value, 2),
@@ -510,32 +519,59 @@ def get_portfolio_summary(
             "USD_CNY": usd_rate,
         },
         "quotes": quotes_dict,  # 可选：返回行情数据
-    }
+    })
+
 
+def _orjson_response(data: dict) -> Response:
+    """持仓汇总含大量浮点字段，直接用 orjson 序列化（与 ResponseWrapperMiddleware 一致）"""
+    return Response(orjson.dumps(data), media_type="application/json")
 
-def _fetch_quotes_for_stocks(stocks: list[Stock]) -> dict:
-    """获取股票列表的实时行情"""
+
+def _round2(value: float | None) -> float | None:
+    """保留两位小数，None 保持为 None（0 仍返回 0.0）"""
+    return None if value is None else round(value, 2)
+
+
+async def _fetch_quotes_for_stocks(stocks: list[Stock], client: httpx.AsyncClient) -> dict:
+    """获取股票列表的实时行情（优先读短期缓存，其余各市场并发请求）"""
     if not stocks:
         return {}
 
-    # 按市场分组
-    market_stocks: dict[str, list[Stock]] = {}
-    for s in stocks:
-        market_stocks.setdefault(s.market, []).append(s)
-
+    now = time.monotonic()
     quotes = {}
-    for market, stock_list in market_stocks.items():
-        try:
-            market_code = MarketCode(market)
-        except ValueError:
+    # 按市场分组（只请求缓存未命中/已过期的股票）
+    market_symbols: dict[str, list[str]] = {}
+    for s in stocks:
+        if s.market not in _VALID_MARKETS:
+            continue
+        market_code = MarketCode(s.market)
+        cached = _quote_cache.get((s.market, s.symbol))
+        if cached and cached[1] > now:
+            quotes[s.symbol] = cached[0]
             continue
+        market_symbols.setdefault(s.market, []).append(_tencent_symbol(s.symbol, market_code))
 
-        symbols = [_tencent_symbol(s.symbol, market_code) for s in stock_list]
-        try:
-            items = _fetch_tencent_quotes(symbols)
-            for item in items:
-                quotes[item["symbol"]] = item
-        except Exception as e:
-            logger.error(f"获取 {market} 行情失败: {e}")
+    if not market_symbols:
+        return quotes
+
+    results = await asyncio.gather(
+        *(_fetch_tencent_quotes_async(symbols, client) for symbols in market_symbols.values()),
+        return_exceptions=True,
+    )
+
+    now = time.monotonic()
+    for market, items in zip(market_symbols, results):
+        if isinstance(items, Exception):
+            logger.error("获取 %s 行情失败: %s", market, items)
+            continue
+        expires_at = now + _quote_ttl(market)
+        for item in items:
+            quotes[item["symbol"]] = item
+            _quote_cache[(market, item["symbol"])] = (item, expires_at)
 
     return quotes
+
+
+def _quote_ttl(market: str) -> float:
+    """行情缓存时长：交易时段内行情持续变动，缓存短一些；休市时行情不变，可缓存更久"""
+    return QUOTE_TTL_TRADING if MARKETS[MarketCode(market)].is_trading_time() else QUOTE_TTL_CLOSED
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from datetime import timezone
 
@@ -7,9 +8,13 @@ from pydantic import BaseModel
 
 from src.web.database import get_db
 from src.web.models import AgentConfig, AgentRun
+from src.core.agent_meta import reload_agent_meta, split_agent_config
 
 logger = logging.getLogger(__name__)
 
+# 盘中扫描 AI 分析并发上限（避免触发模型服务的限流）
+SCAN_AI_CONCURRENCY = 4
+
 
 def _format_datetime(dt) -> str:
     """格式化时间为带时区的 ISO 格式"""
@@ -91,6 +96,7 @@ def update_agent(agent_name: str, update: AgentConfigUpdate, db: Session = Depen
         setattr(agent, key, value)
 
     db.commit()
+    reload_agent_meta(db=db)
     db.refresh(agent)
     return _agent_to_response(agent)
 
@@ -108,6 +114,7 @@ def delete_agent(agent_name: str, db: Session = Depends(get_db)):
 
     db.delete(agent)
     db.commit()
+    reload_agent_meta(db=db)
     return {"ok": True, "message": f"Agent {agent_name} 已删除"}
 
 
@@ -174,13 +181,13 @@ async def scan_intraday(analyze: bool = False, db: Session = Depends(get_db)):
     from src.collectors.akshare_collector import AkshareCollector
     from src.collectors.kline_collector import KlineCollector
     from src.models.market import MarketCode, MARKETS
-    from src.agents.intraday_monitor import IntradayMonitorAgent
+    from src.agents.intraday_monitor import IntradayMonitorAgent, truncate_history
     from src.core.analysis_history import get_latest_analysis, get_analysis
     from src.core.suggestion_pool import save_suggestion
 
     agent_name = "intraday_monitor"
     agent_cfg = db.query(AgentConfig).filter(AgentConfig.name == agent_name).first()
-    agent_kwargs = agent_cfg.config if agent_cfg and agent_cfg.config else {}
+    agent_kwargs, _ = split_agent_config(agent_name, agent_cfg.config if agent_cfg else None)
 
     # 只获取关联了盘中监测 Agent 的股票
     watchlist = load_watchlist_for_agent(agent_name)
@@ -245,6 +252,9 @@ async def scan_intraday(analyze: bool = False, db: Session = Depends(get_db)):
     except Exception:
         daily_analysis = None
         premarket_analysis = None
+    # 摘要只截取一次，逐只股票分析时直接复用
+    daily_summary = truncate_history(daily_analysis.content if daily_analysis else None)
+    premarket_summary = truncate_history(premarket_analysis.content if premarket_analysis else None)
 
     # 构建返回数据
     results = []
@@ -302,22 +312,25 @@ async def scan_intraday(analyze: bool = False, db: Session = Depends(get_db)):
             context = build_context(agent_name)
             agent = monitor_agent
 
-            for item in results:
+            semaphore = asyncio.Semaphore(SCAN_AI_CONCURRENCY)
+
+            async def analyze_item(item: dict):
                 try:
                     stock_data = quote_by_symbol.get(item["symbol"])
                     if not stock_data:
-                        continue
+                        return
 
                     data = {
                         "stock_data": stock_data,
                         "stocks": [stock_data],
                         "kline_summary": item["kline"],
-                        "daily_analysis": daily_analysis.content if daily_analysis else None,
-                        "premarket_analysis": premarket_analysis.content if premarket_analysis else None,
+                        "daily_analysis": daily_summary,
+                        "premarket_analysis": premarket_summary,
                     }
 
                     system_prompt, user_content = agent.build_prompt(data, context)
-                    response = await context.ai_client.chat(system_prompt, user_content)
+                    async with semaphore:
+                        response = await context.ai_client.chat(system_prompt, user_content)
 
                     # 解析结构化建议
                     suggestion = agent._parse_suggestion(response)
@@ -326,7 +339,8 @@ async def scan_intraday(analyze: bool = False, db: Session = Depends(get_db)):
                     item["suggestion"] = suggestion
                     # 写入建议池（用于持仓页展示），避免频繁扫描导致“持有/观望”覆盖太久
                     expires_hours = 4 if suggestion.get("should_alert", True) else 1
-                    save_suggestion(
+                    await asyncio.to_thread(
+                        save_suggestion,
                         stock_symbol=item["symbol"],
                         stock_name=item["name"] or "",
                         action=suggestion.get("action", "watch"),
@@ -350,6 +364,9 @@ async def scan_intraday(analyze: bool = False, db: Session = Depends(get_db)):
                     }
                     logger.error(f"AI 分析失败 {item['symbol']}: {e}")
 
+            # 各股票并发分析（信号量限制同时请求 AI 的数量），结果直接写回 item
+            await asyncio.gather(*(analyze_item(item) for item in results))
+
         except Exception as e:
             logger.error(f"构建 Agent 上下文失败: {e}")
 
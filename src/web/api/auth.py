@@ -1,17 +1,20 @@
 """认证 API - 简单的单用户 JWT 认证"""
 import os
+import functools
 import hashlib
 import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 import jwt
 
-from src.web.database import get_db, SessionLocal
+from src.web.database import get_db, SessionLocal, session_scope
 from src.web.models import AppSettings
 
 router = APIRouter()
@@ -33,6 +36,10 @@ JWT_SECRET_KEY = "jwt_secret"
 # JWT Secret 缓存
 _jwt_secret: str | None = None
 
+# 密码哈希缓存：每个需登录的请求都要判断是否已设置密码，读取到后常驻内存，
+# 设置/修改密码时经 set_password_hash 同步更新。尚未设置时不缓存（其他 worker 可能随时完成设置）
+_password_hash: str | None = None
+
 
 def get_jwt_secret() -> str:
     """获取 JWT Secret（持久化到数据库）"""
@@ -52,9 +59,15 @@ def get_jwt_secret() -> str:
         if setting:
             _jwt_secret = setting.value
         else:
-            _jwt_secret = secrets.token_hex(32)
-            db.add(AppSettings(key=JWT_SECRET_KEY, value=_jwt_secret, description="JWT签名密钥(自动生成)"))
+            # 多个 worker 同时首次启动时只有一个能写入成功，其余回读同一个密钥，
+            # 保证各 worker 签发的 token 可以互相验证
+            db.execute(
+                sqlite_insert(AppSettings)
+                .values(key=JWT_SECRET_KEY, value=secrets.token_hex(32), description="JWT签名密钥(自动生成)")
+                .on_conflict_do_nothing(index_elements=["key"])
+            )
             db.commit()
+            _jwt_secret = db.query(AppSettings.value).filter(AppSettings.key == JWT_SECRET_KEY).scalar()
         return _jwt_secret
     finally:
         db.close()
@@ -93,15 +106,26 @@ def create_token(expires_days: int = JWT_EXPIRE_DAYS) -> tuple[str, datetime]:
     return token, expires_at
 
 
+@functools.lru_cache(maxsize=1024)
+def _decode_token(token: str, secret: str) -> dict:
+    """解码并校验签名（按 token + secret 缓存，同一 token 的重复请求无需重新计算 HMAC）
+
+    校验失败会抛出异常，异常结果不会被缓存。
+    """
+    return jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
+
+
 def verify_token(token: str) -> bool:
     """验证 JWT token"""
     try:
-        jwt.decode(token, get_jwt_secret(), algorithms=[JWT_ALGORITHM])
-        return True
+        payload = _decode_token(token, get_jwt_secret())
     except jwt.ExpiredSignatureError:
         return False
     except jwt.InvalidTokenError:
         return False
+    # 缓存命中时不会再经过 jwt.decode 的过期校验，这里单独检查
+    exp = payload.get("exp")
+    return exp is None or exp > time.time()
 
 
 def get_stored_username(db: Session) -> Optional[str]:
@@ -121,14 +145,24 @@ def set_stored_username(db: Session, username: str):
     db.commit()
 
 
-def get_password_hash(db: Session) -> Optional[str]:
-    """获取存储的密码哈希"""
-    setting = db.query(AppSettings).filter(AppSettings.key == PASSWORD_HASH_KEY).first()
-    return setting.value if setting else None
+def get_password_hash(db: Session | None = None, use_cache: bool = True) -> Optional[str]:
+    """获取存储的密码哈希（已设置后进程内缓存；未设置时每次都查询数据库）
+
+    use_cache=False 时强制读库，用于登录校验（密码可能已在其他 worker 中修改）。
+    """
+    global _password_hash
+    if use_cache and _password_hash:
+        return _password_hash
+
+    with session_scope(db) as db:
+        setting = db.query(AppSettings).filter(AppSettings.key == PASSWORD_HASH_KEY).first()
+    _password_hash = setting.value if setting else None
+    return _password_hash
 
 
 def set_password_hash(db: Session, password_hash: str):
     """设置密码哈希"""
+    global _password_hash
     setting = db.query(AppSettings).filter(AppSettings.key == PASSWORD_HASH_KEY).first()
     if setting:
         setting.value = password_hash
@@ -136,6 +170,7 @@ def set_password_hash(db: Session, password_hash: str):
         setting = AppSettings(key=PASSWORD_HASH_KEY, value=password_hash, description="认证密码哈希")
         db.add(setting)
     db.commit()
+    _password_hash = password_hash
 
 
 def init_auth_from_env(db: Session) -> bool:
@@ -159,11 +194,10 @@ def init_auth_from_env(db: Session) -> bool:
 
 async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db),
 ):
     """验证当前用户（用作依赖）"""
-    # 检查是否已设置密码
-    password_hash = get_password_hash(db)
+    # 检查是否已设置密码（命中缓存时不访问数据库）
+    password_hash = get_password_hash()
     if not password_hash:
         # 未设置密码，允许访问（初始状态）
         return None
@@ -218,7 +252,7 @@ async def setup_password(data: SetupRequest, db: Session = Depends(get_db)):
 @router.post("/login", response_model=TokenResponse)
 async def login(data: LoginRequest, db: Session = Depends(get_db)):
     """登录"""
-    stored_hash = get_password_hash(db)
+    stored_hash = get_password_hash(db, use_cache=False)
     stored_username = get_stored_username(db)
     if not stored_hash or not stored_username:
         raise HTTPException(400, "请先设置账号")
@@ -4,6 +4,7 @@ from pydantic import BaseModel
 
 from src.web.database import get_db
 from src.web.models import NotifyChannel
+from src.core import config_cache
 from src.core.notifier import NotifierManager, CHANNEL_TYPES
 
 router = APIRouter()
@@ -55,6 +56,7 @@ def create_channel(body: ChannelCreate, db: Session = Depends(get_db)):
     channel = NotifyChannel(**body.model_dump())
     db.add(channel)
     db.commit()
+    config_cache.invalidate()
     db.refresh(channel)
     return channel
 
@@ -73,6 +75,7 @@ def update_channel(channel_id: int, body: ChannelUpdate, db: Session = Depends(g
         setattr(channel, key, value)
 
     db.commit()
+    config_cache.invalidate()
     db.refresh(channel)
     return channel
 
@@ -84,6 +87,7 @@ def delete_channel(channel_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "通知渠道不存在")
     db.delete(channel)
     db.commit()
+    config_cache.invalidate()
     return {"ok": True}
 
 
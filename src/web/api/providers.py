@@ -4,6 +4,7 @@ from pydantic import BaseModel
 
 from src.web.database import get_db
 from src.web.models import AIService, AIModel
+from src.core import config_cache
 from src.core.ai_client import AIClient
 
 router = APIRouter()
@@ -69,6 +70,7 @@ def create_service(body: ServiceCreate, db: Session = Depends(get_db)):
     service = AIService(**body.model_dump())
     db.add(service)
     db.commit()
+    config_cache.invalidate()
     db.refresh(service)
     return _service_to_response(service)
 
@@ -83,6 +85,7 @@ def update_service(service_id: int, body: ServiceUpdate, db: Session = Depends(g
         setattr(service, key, value)
 
     db.commit()
+    config_cache.invalidate()
     db.refresh(service)
     return _service_to_response(service)
 
@@ -94,6 +97,7 @@ def delete_service(service_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "AI 服务商不存在")
     db.delete(service)
     db.commit()
+    config_cache.invalidate()
     return {"ok": True}
 
 
@@ -133,6 +137,7 @@ def create_model(body: ModelCreate, db: Session = Depends(get_db)):
     model = AIModel(**data)
     db.add(model)
     db.commit()
+    config_cache.invalidate()
     db.refresh(model)
     return model
 
@@ -151,6 +156,7 @@ def update_model(model_id: int, body: ModelUpdate, db: Session = Depends(get_db)
         setattr(model, key, value)
 
     db.commit()
+    config_cache.invalidate()
     db.refresh(model)
     return model
 
@@ -162,6 +168,7 @@ def delete_model(model_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "AI 模型不存在")
     db.delete(model)
     db.commit()
+    config_cache.invalidate()
     return {"ok": True}
 
 
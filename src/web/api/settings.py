@@ -5,7 +5,8 @@ from pydantic import BaseModel
 
 from src.web.database import get_db
 from src.web.models import AppSettings
-from src.config import Settings
+from src.core import config_cache
+from src.config import get_settings
 
 router = APIRouter()
 
@@ -54,7 +55,7 @@ SETTING_KEYS = list(SETTING_DESCRIPTIONS.keys())
 
 def _get_env_defaults() -> dict[str, str]:
     """从 .env / 环境变量读取当前值作为默认"""
-    s = Settings()
+    s = get_settings()
     return {
         "http_proxy": s.http_proxy,
     }
@@ -97,6 +98,7 @@ def update_setting(key: str, update: SettingUpdate, db: Session = Depends(get_db
         setting.value = update.value
 
     db.commit()
+    config_cache.invalidate()
     db.refresh(setting)
     return setting
 
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 
 from src.web.database import get_db
 from src.web.models import Stock, StockAgent, AgentConfig
+from src.core import config_cache
 from src.web.stock_list import search_stocks, refresh_stock_list
 from src.collectors.akshare_collector import _tencent_symbol, _fetch_tencent_quotes
 from src.models.market import MarketCode, MARKETS
@@ -232,6 +233,7 @@ def delete_stock(stock_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "股票不存在")
     db.delete(db_stock)
     db.commit()
+    config_cache.invalidate()
     return {"ok": True}
 
 
@@ -259,6 +261,7 @@ def update_stock_agents(stock_id: int, body: StockAgentUpdate, db: Session = Dep
         ))
 
     db.commit()
+    config_cache.invalidate()
     db.refresh(db_stock)
     return _stock_to_response(db_stock)
 
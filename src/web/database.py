@@ -1,15 +1,50 @@
 import json
 import logging
 import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "panwatch.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+# 最大并发连接数：同步 API 路由在线程池中各持有一个 Session，
+# 服务端按此值放宽线程池上限，保证线程数不超过可用连接数（避免排队等连接超时）
+MAX_DB_CONNECTIONS = 64
+POOL_SIZE = 10
+
+engine = create_engine(
+    f"sqlite:///{DB_PATH}",
+    echo=False,
+    poolclass=QueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_DB_CONNECTIONS - POOL_SIZE,
+    pool_pre_ping=True,
+    pool_recycle=300,
+    connect_args={"check_same_thread": False},
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragma(dbapi_conn, connection_record):
+    """新建连接时一次性设置 PRAGMA，连接由连接池长期复用，设置随连接保留
+
+    - WAL 模式下读写互不阻塞，并发读取无需等待全局写锁
+    - WAL 下 synchronous=NORMAL 已足够安全，省去每次提交的 fsync
+    - 加大页缓存（负数单位为 KiB），连接复用时缓存保持热数据
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-16000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
 SessionLocal = sessionmaker(bind=engine)
 
 
@@ -25,6 +60,19 @@ def get_db():
         db.close()
 
 
+@contextmanager
+def session_scope(db: Session | None = None):
+    """复用调用方传入的 session；未传入时新建一个并在退出时关闭"""
+    if db is not None:
+        yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
     _migrate(engine)
@@ -3,6 +3,8 @@ import logging
 import threading
 from datetime import datetime, timezone
 
+from sqlalchemy import insert
+
 from src.web.database import SessionLocal
 from src.web.models import LogEntry
 
@@ -53,8 +55,8 @@ class DBLogHandler(logging.Handler):
         try:
             db = SessionLocal()
             try:
-                for entry in entries:
-                    db.add(LogEntry(**entry))
+                # Single executemany INSERT instead of one ORM object per record
+                db.execute(insert(LogEntry), entries)
                 db.commit()
                 self._cleanup(db)
             finally:
@@ -95,6 +95,19 @@ class Position(Base):
     account = relationship("Account", back_populates="positions")
     stock = relationship("Stock", back_populates="positions")
 
+    # 关联信息（供 PositionResponse 通过 from_attributes 直接读取）
+    @property
+    def account_name(self) -> str | None:
+        return self.account.name if self.account else None
+
+    @property
+    def stock_symbol(self) -> str | None:
+        return self.stock.symbol if self.stock else None
+
+    @property
+    def stock_name(self) -> str | None:
+        return self.stock.name if self.stock else None
+
 
 class StockAgent(Base):
     """多对多: 每只股票可被多个 Agent 监控"""
@@ -1,6 +1,7 @@
 """统一 API 响应格式中间件"""
 import json
 
+import orjson
 from starlette.types import ASGIApp, Receive, Scope, Send
 
 
@@ -48,8 +49,8 @@ class ResponseWrapperMiddleware:
             return
 
         try:
-            original_data = json.loads(body)
-        except (json.JSONDecodeError, ValueError):
+            original_data = orjson.loads(body)
+        except orjson.JSONDecodeError:
             await send({"type": "http.response.start", "status": status_code, "headers": response_headers})
             await send({"type": "http.response.body", "body": body})
             return
@@ -61,7 +62,8 @@ class ResponseWrapperMiddleware:
             message = detail if isinstance(detail, str) else json.dumps(detail, ensure_ascii=False)
             wrapped = {"code": status_code, "data": None, "message": message}
 
-        new_body = json.dumps(wrapped, ensure_ascii=False).encode()
+        # orjson 直接输出 UTF-8 字节（不转义中文），与 ensure_ascii=False 一致
+        new_body = orjson.dumps(wrapped)
 
         # 更新 content-length header
         new_headers = []
@@ -4,6 +4,7 @@ import os
 import time
 import logging
 import concurrent.futures
+import threading
 
 import httpx
 
@@ -253,63 +254,63 @@ def _fetch_from_akshare() -> list[dict]:
     return stocks
 
 
-def refresh_stock_list() -> list[dict]:
-    """拉取 A 股和港股列表并缓存"""
-    stocks = []
-
-    # A 股: 东方财富优先，akshare 备用
+def _fetch_cn_stocks() -> list[dict]:
+    """A 股: 东方财富优先，akshare 备用"""
     try:
-        cn_stocks = _fetch_from_eastmoney()
-        stocks.extend(cn_stocks)
-        logger.info(f"东方财富获取 A 股列表成功: {len(cn_stocks)} 只")
+        return _fetch_from_eastmoney()
     except Exception as e:
-        logger.warning(f"东方财富获取 A 股失败: {e}")
+        logger.warning(f"东方财富获取 A 股失败: {e}，改用 akshare")
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        future = pool.submit(_fetch_from_akshare)
         try:
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-                future = pool.submit(_fetch_from_akshare)
-                cn_stocks = future.result(timeout=15)
-                stocks.extend(cn_stocks)
-            logger.info(f"akshare 获取 A 股列表成功: {len(cn_stocks)} 只")
+            return future.result(timeout=15)
         except concurrent.futures.TimeoutError:
-            logger.error("akshare 获取超时（15s）")
-        except Exception as e2:
-            logger.error(f"A 股数据源获取失败: {e2}")
+            raise RuntimeError("akshare 获取超时（15s）") from None
 
-    # 港股: 东方财富
-    try:
-        hk_stocks = _fetch_hk_from_eastmoney()
-        stocks.extend(hk_stocks)
-        logger.info(f"东方财富获取港股列表成功: {len(hk_stocks)} 只")
-    except Exception as e:
-        logger.warning(f"东方财富获取港股失败: {e}")
 
-    # 美股: 东方财富
-    try:
-        us_stocks = _fetch_us_from_eastmoney()
-        stocks.extend(us_stocks)
-        logger.info(f"东方财富获取美股列表成功: {len(us_stocks)} 只")
-    except Exception as e:
-        logger.warning(f"东方财富获取美股失败: {e}")
+def _stopped(stop: threading.Event | None) -> bool:
+    if stop is not None and stop.is_set():
+        logger.info("股票列表刷新已中止（服务关闭）")
+        return True
+    return False
 
-    # 北交所: 东方财富
-    try:
-        bj_stocks = _fetch_bj_from_eastmoney()
-        stocks.extend(bj_stocks)
-        logger.info(f"东方财富获取北交所列表成功: {len(bj_stocks)} 只")
-    except Exception as e:
-        logger.warning(f"东方财富获取北交所失败: {e}")
 
+def refresh_stock_list(stop: threading.Event | None = None) -> list[dict]:
+    """拉取 A 股、港股、美股、北交所列表并缓存
+
+    stop 被设置时（服务关闭）在下一个市场开始前中止，不写入不完整的缓存。
+    """
+    stages = [
+        ("A 股", _fetch_cn_stocks),
+        ("港股", _fetch_hk_from_eastmoney),
+        ("美股", _fetch_us_from_eastmoney),
+        ("北交所", _fetch_bj_from_eastmoney),
+    ]
+    stocks = []
+    for label, fetch in stages:
+        if _stopped(stop):
+            return stocks
+        try:
+            items = fetch()
+        except Exception as e:
+            logger.error(f"获取{label}列表失败: {e}")
+            continue
+        stocks.extend(items)
+        logger.info(f"获取{label}列表成功: {len(items)} 只")
+
+    if _stopped(stop):
+        return stocks
     if stocks:
         _save_cache(stocks)
     return stocks
 
 
-def get_stock_list() -> list[dict]:
+def get_stock_list(stop: threading.Event | None = None) -> list[dict]:
     """获取股票列表(优先缓存)"""
     cached = _load_cache()
     if cached:
         return cached
-    return refresh_stock_list()
+    return refresh_stock_list(stop)
 
 
 def _realtime_search(query: str, market: str = "", limit: int = 20) -> list[dict]:
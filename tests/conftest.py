@@ -0,0 +1,42 @@
+"""测试公共夹具：内存数据库、配置缓存隔离"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core import config_cache  # noqa: E402
+from src.web import database  # noqa: E402
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    """内存 SQLite，替换全局 SessionLocal，避免测试读写 data/panwatch.db"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    database.Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(database, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def _clear_config_cache():
+    config_cache.invalidate()
+    yield
+    config_cache.invalidate()
@@ -0,0 +1,16 @@
+"""测试用 DB 模型工厂"""
+from src.web.models import Account, Stock
+
+
+def make_account(db, name: str = "测试账户", available_funds: float = 0) -> Account:
+    account = Account(name=name, available_funds=available_funds)
+    db.add(account)
+    db.commit()
+    return account
+
+
+def make_stock(db, symbol: str = "600519", name: str = "贵州茅台", market: str = "CN") -> Stock:
+    stock = Stock(symbol=symbol, name=name, market=market)
+    db.add(stock)
+    db.commit()
+    return stock
@@ -0,0 +1,112 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.web.api import accounts
+from src.web.api.accounts import PositionCreate, create_position
+from src.web.models import Position
+from tests.factories import make_account, make_stock
+
+
+class FakeFxClient:
+    def __init__(self, rate: str = "0.91", fail: bool = False):
+        self.rate = rate
+        self.fail = fail
+        self.calls = 0
+
+    async def get(self, url: str):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("network down")
+        return SimpleNamespace(text=f'var hq_str_fx_shkdcny="10:00:00,{self.rate},0.92";')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """替换 accounts 模块的时钟，便于模拟汇率缓存过期"""
+    now = [10_000.0]
+    monkeypatch.setattr(accounts, "time", SimpleNamespace(time=lambda: now[0], monotonic=lambda: now[0]))
+    monkeypatch.setitem(accounts._fx_cache, "HKD", {"rate": 0.92, "ts": 0, "attempted": 0.0})
+    monkeypatch.setitem(accounts._fx_locks, "HKD", asyncio.Lock())
+    return now
+
+
+def test_fx_rate_fetches_then_caches(clock):
+    client = FakeFxClient()
+
+    assert asyncio.run(accounts._get_fx_rate(client, "HKD")) == 0.91
+    clock[0] += accounts.EXCHANGE_RATE_TTL - 1
+    assert asyncio.run(accounts._get_fx_rate(client, "HKD")) == 0.91
+    assert client.calls == 1
+
+
+def test_fx_rate_refreshes_after_ttl(clock):
+    client = FakeFxClient()
+    asyncio.run(accounts._get_fx_rate(client, "HKD"))
+
+    clock[0] += accounts.EXCHANGE_RATE_TTL + 1
+    client.rate = "0.93"
+
+    assert asyncio.run(accounts._get_fx_rate(client, "HKD")) == 0.93
+    assert client.calls == 2
+
+
+def test_fx_rate_failure_keeps_cached_rate(clock):
+    assert asyncio.run(accounts._get_fx_rate(FakeFxClient(fail=True), "HKD")) == 0.92
+
+
+def test_fx_rate_concurrent_refresh_requests_once(clock):
+    client = FakeFxClient()
+
+    async def main():
+        return await asyncio.gather(*(accounts._get_fx_rate(client, "HKD") for _ in range(5)))
+
+    assert asyncio.run(main()) == [0.91] * 5
+    assert client.calls == 1
+
+
+def test_create_position(db):
+    account = make_account(db)
+    stock = make_stock(db)
+
+    result = create_position(
+        PositionCreate(account_id=account.id, stock_id=stock.id, cost_price=1500.0, quantity=100),
+        db=db,
+    )
+
+    assert result["account_name"] == "测试账户"
+    assert result["stock_symbol"] == "600519"
+    assert result["stock_name"] == "贵州茅台"
+    assert result["quantity"] == 100
+    assert db.query(Position).count() == 1
+
+
+def test_create_position_rejects_duplicate(db):
+    account = make_account(db)
+    stock = make_stock(db)
+    data = PositionCreate(account_id=account.id, stock_id=stock.id, cost_price=1500.0, quantity=100)
+    create_position(data, db=db)
+
+    with pytest.raises(HTTPException) as exc:
+        create_position(data, db=db)
+    assert exc.value.status_code == 400
+    assert "已有" in exc.value.detail
+
+
+@pytest.mark.parametrize("missing, detail", [("account", "账户不存在"), ("stock", "股票不存在")])
+def test_create_position_requires_account_and_stock(db, missing, detail):
+    account = make_account(db)
+    stock = make_stock(db)
+    data = PositionCreate(
+        account_id=account.id + 1 if missing == "account" else account.id,
+        stock_id=stock.id + 1 if missing == "stock" else stock.id,
+        cost_price=10.0,
+        quantity=100,
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        create_position(data, db=db)
+    assert exc.value.detail == detail
+    assert db.query(Position).count() == 0
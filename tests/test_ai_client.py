@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import ai_client, config_cache
+
+
+class FakeAsyncOpenAI:
+    instances: list["FakeAsyncOpenAI"] = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        FakeAsyncOpenAI.instances.append(self)
+
+    async def _create(self, **kwargs):
+        await asyncio.sleep(0.01)
+        usage = SimpleNamespace(prompt_tokens=1, completion_tokens=2, total_tokens=3)
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_openai(monkeypatch):
+    FakeAsyncOpenAI.instances = []
+    monkeypatch.setattr(ai_client, "AsyncOpenAI", FakeAsyncOpenAI)
+    monkeypatch.setattr(ai_client, "_shared_clients", {})
+
+
+def test_clients_share_pool_but_not_token_count():
+    async def main():
+        a = ai_client.AIClient("https://api.example.com", "key", "model-a")
+        b = ai_client.AIClient("https://api.example.com", "key", "model-b")
+        await asyncio.gather(a.chat("sys", "x"), b.chat("sys", "y"), a.chat("sys", "z"))
+        return a, b
+
+    a, b = asyncio.run(main())
+
+    assert len(FakeAsyncOpenAI.instances) == 1
+    assert a.total_tokens_used == 6
+    assert b.total_tokens_used == 3
+
+
+def test_invalidate_closes_idle_pool():
+    async def main():
+        client = ai_client.AIClient("https://api.example.com", "key", "model")
+        await client.chat("sys", "x")
+        config_cache.invalidate()
+        await asyncio.sleep(0)
+        await client.chat("sys", "y")
+
+    asyncio.run(main())
+
+    first, second = FakeAsyncOpenAI.instances
+    assert first.closed
+    assert not second.closed
+
+
+def test_invalidate_defers_close_until_call_finishes():
+    async def main():
+        client = ai_client.AIClient("https://api.example.com", "key", "model")
+        call = asyncio.create_task(client.chat("sys", "x"))
+        await asyncio.sleep(0)
+        config_cache.invalidate()
+        pool = FakeAsyncOpenAI.instances[0]
+        closed_during_call = pool.closed
+        assert await call == "ok"
+        return closed_during_call, pool.closed
+
+    assert asyncio.run(main()) == (False, True)
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.collectors import akshare_collector
+from src.models.market import MarketCode
+
+
+class FakeCollector:
+    """记录每次批量查询的代码；fail 中的代码出现在批次里时整批抛出异常"""
+
+    def __init__(self, delay: float = 0.01, fail: set[str] | None = None):
+        self.delay = delay
+        self.fail = fail or set()
+        self.calls: list[list[str]] = []
+
+    async def get_stock_data(self, symbols: list[str]):
+        self.calls.append(sorted(symbols))
+        await asyncio.sleep(self.delay)
+        if self.fail & set(symbols):
+            raise RuntimeError("batch failed")
+        return [SimpleNamespace(symbol=s) for s in symbols]
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    fake = FakeCollector()
+    monkeypatch.setattr(akshare_collector, "get_collector", lambda market: fake)
+    yield fake
+    assert not akshare_collector._inflight_quotes
+    assert not akshare_collector._pending_quotes
+
+
+def _symbols(stocks) -> list[str]:
+    return [s.symbol for s in stocks]
+
+
+def test_sequential_calls_are_not_merged(collector):
+    async def main():
+        first = await akshare_collector.fetch_quotes(MarketCode.CN, ["600519"])
+        second = await akshare_collector.fetch_quotes(MarketCode.CN, ["000001"])
+        return first, second
+
+    first, second = asyncio.run(main())
+
+    assert _symbols(first) == ["600519"]
+    assert _symbols(second) == ["000001"]
+    assert collector.calls == [["600519"], ["000001"]]
+
+
+def test_concurrent_calls_coalesce(collector):
+    async def main():
+        return await asyncio.gather(
+            akshare_collector.fetch_quotes(MarketCode.CN, ["a"]),
+            akshare_collector.fetch_quotes(MarketCode.CN, ["b"]),
+            akshare_collector.fetch_quotes(MarketCode.CN, ["c", "b"]),
+            akshare_collector.fetch_quotes(MarketCode.CN, ["a"]),
+        )
+
+    results = asyncio.run(main())
+
+    assert [sorted(_symbols(r)) for r in results] == [["a"], ["b"], ["b", "c"], ["a"]]
+    # 首个请求立即发出；其余未被覆盖的代码合并为下一批，已覆盖的直接共享
+    assert collector.calls == [["a"], ["b", "c"]]
+
+
+def test_cancelled_caller_does_not_affect_others(collector):
+    async def main():
+        cancelled = asyncio.create_task(akshare_collector.fetch_quotes(MarketCode.CN, ["a"]))
+        other = asyncio.create_task(akshare_collector.fetch_quotes(MarketCode.CN, ["a"]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await other
+
+    assert _symbols(asyncio.run(main())) == ["a"]
+
+
+@pytest.mark.parametrize("started", [False, True], ids=["before-start", "in-flight"])
+def test_cancelled_fetch_releases_waiters(collector, started):
+    collector.delay = 10
+
+    async def main():
+        first = asyncio.create_task(akshare_collector.fetch_quotes(MarketCode.CN, ["a"]))
+        pending = asyncio.create_task(akshare_collector.fetch_quotes(MarketCode.CN, ["b"]))
+        await asyncio.sleep(0.001 if started else 0)
+        for task in list(akshare_collector._fetch_tasks):
+            task.cancel()
+        return await asyncio.wait_for(
+            asyncio.gather(first, pending, return_exceptions=True), timeout=1
+        )
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+
+
+def test_sole_caller_gets_batch_error(collector):
+    collector.fail = {"bad"}
+
+    async def main():
+        return await akshare_collector.fetch_quotes(MarketCode.CN, ["bad"])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+    assert collector.calls == [["bad"]]
+
+
+def test_failed_shared_batch_retries_each_caller(collector):
+    collector.fail = {"bad"}
+
+    async def main():
+        return await asyncio.gather(
+            akshare_collector.fetch_quotes(MarketCode.CN, ["a"]),
+            akshare_collector.fetch_quotes(MarketCode.CN, ["b"]),
+            akshare_collector.fetch_quotes(MarketCode.CN, ["bad"]),
+            return_exceptions=True,
+        )
+
+    a, b, bad = asyncio.run(main())
+
+    assert _symbols(a) == ["a"]
+    assert _symbols(b) == ["b"]
+    assert isinstance(bad, RuntimeError)
+    assert collector.calls == [["a"], ["b", "bad"], ["b"], ["bad"]]
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import jwt
+import pytest
+
+from src.web.api import auth
+
+SECRET = "test-secret-0123456789abcdef0123456789"
+
+
+@pytest.fixture(autouse=True)
+def _reset_auth(monkeypatch):
+    monkeypatch.setattr(auth, "_password_hash", None)
+    monkeypatch.setattr(auth, "get_jwt_secret", lambda: SECRET)
+    auth._decode_token.cache_clear()
+    yield
+    auth._decode_token.cache_clear()
+
+
+def _token(expires_in: timedelta) -> str:
+    payload = {"exp": datetime.now(timezone.utc) + expires_in, "sub": "user"}
+    return jwt.encode(payload, SECRET, algorithm=auth.JWT_ALGORITHM)
+
+
+def test_missing_password_hash_is_not_cached(db):
+    assert auth.get_password_hash(db) is None
+
+    # 其他 worker 完成设置后，本进程下一次读取即可看到
+    db.add(auth.AppSettings(key=auth.PASSWORD_HASH_KEY, value="hash"))
+    db.commit()
+
+    assert auth.get_password_hash(db) == "hash"
+
+
+def test_password_hash_is_cached_once_set(db):
+    auth.set_password_hash(db, "hash")
+    db.query(auth.AppSettings).filter(auth.AppSettings.key == auth.PASSWORD_HASH_KEY).delete()
+    db.commit()
+
+    assert auth.get_password_hash(db) == "hash"
+    assert auth.get_password_hash(db, use_cache=False) is None
+
+
+def test_verify_token_valid():
+    assert auth.verify_token(_token(timedelta(hours=1))) is True
+
+
+def test_verify_token_rejects_bad_signature():
+    token = jwt.encode({"sub": "user"}, "other-secret-0123456789abcdef0123456789", algorithm=auth.JWT_ALGORITHM)
+
+    assert auth.verify_token(token) is False
+
+
+def test_verify_token_rejects_expired():
+    assert auth.verify_token(_token(timedelta(seconds=-1))) is False
+
+
+def test_cached_token_still_expires(monkeypatch):
+    token = _token(timedelta(minutes=5))
+    assert auth.verify_token(token) is True
+
+    # 解码结果已缓存，过期判断不能依赖 jwt.decode
+    monkeypatch.setattr(auth, "time", SimpleNamespace(time=lambda: datetime.now().timestamp() + 600))
+
+    assert auth.verify_token(token) is False
+    assert auth._decode_token.cache_info().hits == 1
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from src.core import config_cache
+
+
+def _fake_clock(monkeypatch, start: float = 1000.0) -> list[float]:
+    now = [start]
+    monkeypatch.setattr(config_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_cached_reuses_value_within_ttl(monkeypatch):
+    now = _fake_clock(monkeypatch)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    assert config_cache.cached("k", loader, ttl=10) == 1
+    now[0] += 9
+    assert config_cache.cached("k", loader, ttl=10) == 1
+    assert len(calls) == 1
+
+
+def test_cached_reloads_after_ttl(monkeypatch):
+    now = _fake_clock(monkeypatch)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    config_cache.cached("k", loader, ttl=10)
+    now[0] += 11
+    assert config_cache.cached("k", loader, ttl=10) == 2
+
+
+def test_invalidate_clears_cache():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return len(calls)
+
+    config_cache.cached("k", loader)
+    config_cache.invalidate()
+    assert config_cache.cached("k", loader) == 2
+
+
+def test_load_racing_with_invalidate_is_not_stored():
+    calls = []
+
+    def stale_loader():
+        calls.append("stale")
+        # 加载期间配置被修改：本次结果可以返回，但不能写回缓存
+        config_cache.invalidate()
+        return "stale"
+
+    assert config_cache.cached("k", stale_loader) == "stale"
+    assert config_cache.cached("k", lambda: "fresh") == "fresh"
+    assert calls == ["stale"]
+
+
+def test_invalidate_runs_listeners(monkeypatch):
+    fired = []
+    monkeypatch.setattr(config_cache, "_invalidate_listeners", [lambda: fired.append(1)])
+
+    config_cache.invalidate()
+
+    assert fired == [1]
+
+
+def test_config_cached_ignores_db_in_key():
+    calls = []
+
+    @config_cache.config_cached
+    def lookup(name: str, db=None):
+        calls.append((name, db))
+        return name.upper()
+
+    assert lookup("a", db=object()) == "A"
+    assert lookup("a", db=object()) == "A"
+    assert lookup("b", db=object()) == "B"
+    assert [name for name, _ in calls] == ["a", "b"]
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from src.agents.intraday_monitor import IntradayMonitorAgent
+from src.web.models import NotifyThrottle
+
+
+def _throttle_record(db, symbol: str = "600519") -> NotifyThrottle:
+    return db.query(NotifyThrottle).filter(NotifyThrottle.stock_symbol == symbol).one()
+
+
+def test_throttle_allows_first_notify(db):
+    agent = IntradayMonitorAgent(throttle_minutes=30)
+    now = datetime(2024, 1, 2, 10, 0)
+
+    assert agent._check_and_update_throttle("600519", now) is True
+    record = _throttle_record(db)
+    assert record.last_notify_at == now
+    assert record.notify_count == 1
+
+
+def test_throttle_blocks_within_window(db):
+    agent = IntradayMonitorAgent(throttle_minutes=30)
+    now = datetime(2024, 1, 2, 10, 0)
+    agent._check_and_update_throttle("600519", now)
+
+    assert agent._check_and_update_throttle("600519", now + timedelta(minutes=10)) is False
+
+
+def test_throttle_reads_records_from_other_instances(db):
+    now = datetime(2024, 1, 2, 10, 0)
+    IntradayMonitorAgent(throttle_minutes=30)._check_and_update_throttle("600519", now)
+
+    # 新实例本地缓存为空，需以数据库中的记录为准
+    agent = IntradayMonitorAgent(throttle_minutes=30)
+    assert agent._check_and_update_throttle("600519", now + timedelta(minutes=10)) is False
+
+
+def test_throttle_allows_after_window_and_counts(db):
+    agent = IntradayMonitorAgent(throttle_minutes=30)
+    now = datetime(2024, 1, 2, 10, 0)
+    agent._check_and_update_throttle("600519", now)
+
+    later = now + timedelta(minutes=31)
+    assert agent._check_and_update_throttle("600519", later) is True
+    record = _throttle_record(db)
+    db.refresh(record)
+    assert record.last_notify_at == later
+    assert record.notify_count == 2
+
+
+def test_throttle_resets_count_on_new_day(db):
+    agent = IntradayMonitorAgent(throttle_minutes=30)
+    now = datetime(2024, 1, 2, 14, 0)
+    agent._check_and_update_throttle("600519", now)
+
+    assert agent._check_and_update_throttle("600519", now + timedelta(days=1)) is True
+    assert _throttle_record(db).notify_count == 1
+
+
+def test_parse_suggestion_takes_first_keyword():
+    agent = IntradayMonitorAgent()
+
+    result = agent._parse_suggestion("放量突破，可考虑加仓，若跌破支撑则减仓")
+
+    assert result["action"] == "add"
+    assert result["action_label"] == "加仓"
+
+
+def test_parse_suggestion_prefers_suggest_field():
+    agent = IntradayMonitorAgent()
+
+    result = agent._parse_suggestion("信号：冲高回落，前期可持有\n建议：减仓，锁定部分利润\n理由：量能不足")
+
+    assert result["action"] == "reduce"
+    assert result["signal"] == "冲高回落，前期可持有"
+    assert result["reason"] == "量能不足"
+
+
+def test_parse_suggestion_no_alert_marker():
+    agent = IntradayMonitorAgent()
+
+    result = agent._parse_suggestion("[无需提醒] 走势平稳，建议加仓")
+
+    assert result["action"] == "hold"
+    assert result["should_alert"] is False
+
+
+def test_parse_suggestion_defaults_to_watch():
+    result = IntradayMonitorAgent()._parse_suggestion("盘面平淡")
+
+    assert result["action"] == "watch"
+    assert result["action_label"] == "观望"